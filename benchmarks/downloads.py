@@ -0,0 +1,240 @@
+"""Check the resumable downloader against a local HTTP server.
+
+    python benchmarks/downloads.py
+
+The server supports Range requests and can be told to cut a response short,
+to ignore Range headers, or to answer 416 for a file that is already
+complete. Each check downloads a random payload and fails when the result
+differs from it, or when the expected error is not raised.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import zipfile
+from collections.abc import Callable
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+import typer
+from rich import print
+from rich.table import Table
+
+from tos_datasets.download import (
+    ChecksumMismatchError,
+    IncompleteDownloadError,
+    download,
+    download_archive,
+)
+
+
+class Server(ThreadingHTTPServer):
+    payload = b""
+    # Bytes sent by successive responses before the connection is dropped
+    cuts: list[int]
+    honor_range = True
+    # The Range header of every request, None when absent
+    ranges: list[str | None]
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Server
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        payload = self.server.payload
+        header = self.headers.get("Range")
+        self.server.ranges.append(header)
+        offset = 0
+        if header and self.server.honor_range:
+            offset = int(header.removeprefix("bytes=").removesuffix("-"))
+            if offset >= len(payload):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(payload)}")
+                self.end_headers()
+                return
+        body = payload[offset:]
+        self.send_response(206 if offset else 200)
+        if offset:
+            self.send_header(
+                "Content-Range", f"bytes {offset}-{len(payload) - 1}/{len(payload)}"
+            )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.server.cuts:
+            # Promise the whole body, send part of it and hang up
+            self.wfile.write(body[: self.server.cuts.pop(0)])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@contextmanager
+def serve(payload: bytes):
+    server = Server(("127.0.0.1", 0), Handler)
+    server.payload, server.cuts, server.ranges = payload, [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch(url: str, path: Path, **kwargs) -> Path:
+    # Digests are recorded next to the download, not in the user's cache
+    return download(url, path, digests=path.with_name("digests"), **kwargs)
+
+
+def check_fresh(server: Server, url: str, path: Path):
+    fetch(url, path)
+    assert path.read_bytes() == server.payload
+    assert server.ranges == [None]
+
+
+def check_interrupted(server: Server, url: str, path: Path):
+    server.cuts = [len(server.payload) // 3, len(server.payload) // 3]
+    fetch(url, path, chunk_size=1 << 14)
+    assert path.read_bytes() == server.payload
+    assert len(server.ranges) == 3 and server.ranges[0] is None
+    assert all(header.startswith("bytes=") for header in server.ranges[1:])
+
+
+def check_partial_file(server: Server, url: str, path: Path):
+    path.with_name(path.name + ".part").write_bytes(server.payload[:1000])
+    fetch(url, path)
+    assert path.read_bytes() == server.payload
+    assert server.ranges == ["bytes=1000-"]
+
+
+def check_complete_part(server: Server, url: str, path: Path):
+    # The server answers 416 and the partial file is used as is
+    path.with_name(path.name + ".part").write_bytes(server.payload)
+    fetch(url, path)
+    assert path.read_bytes() == server.payload
+    assert server.ranges == [f"bytes={len(server.payload)}-"]
+
+
+def check_range_ignored(server: Server, url: str, path: Path):
+    server.honor_range = False
+    path.with_name(path.name + ".part").write_bytes(b"stale bytes")
+    fetch(url, path)
+    assert path.read_bytes() == server.payload
+
+
+def check_sha256(server: Server, url: str, path: Path):
+    digest = hashlib.sha256(server.payload).hexdigest()
+    fetch(url, path, sha256=digest)
+    assert path.read_bytes() == server.payload
+    # An existing file is verified against the digest too
+    try:
+        fetch(url, path, sha256="0" * 64)
+    except ChecksumMismatchError:
+        return
+    raise AssertionError("an existing file with the wrong digest was accepted")
+
+
+def check_sha256_mismatch(server: Server, url: str, path: Path):
+    try:
+        fetch(url, path, sha256="0" * 64)
+    except ChecksumMismatchError:
+        assert not path.exists()
+        assert not path.with_name(path.name + ".part").exists()
+        return
+    raise AssertionError("a payload with the wrong digest was accepted")
+
+
+def check_recorded_digest(server: Server, url: str, path: Path):
+    # The first download records the digest, later ones are checked against it
+    fetch(url, path)
+    path.unlink()
+    server.payload = server.payload[::-1]
+    try:
+        fetch(url, path)
+    except ChecksumMismatchError:
+        assert not path.exists()
+    else:
+        raise AssertionError("a changed payload was accepted")
+    # A file placed elsewhere without downloading it, like a synthetic source
+    copy = path.with_name("copy.zip")
+    copy.write_bytes(b"synthetic")
+    fetch(url, copy)
+    assert copy.read_bytes() == b"synthetic"
+
+
+def check_retries_exhausted(server: Server, url: str, path: Path):
+    server.cuts = [100] * 3
+    try:
+        fetch(url, path, retries=3)
+    except (requests.exceptions.ChunkedEncodingError, IncompleteDownloadError):
+        assert not path.exists()
+        assert len(server.ranges) == 3
+        return
+    raise AssertionError("a download cut three times did not fail")
+
+
+def check_archive_cleanup(server: Server, url: str, path: Path):
+    # Other files in `cache_dir` survive `keep_cache=False`
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("corpus/a.txt", "a")
+    server.payload = buffer.getvalue()
+    neighbour = path.with_name("text") / "a.txt"
+    neighbour.parent.mkdir()
+    neighbour.write_text("kept")
+    digests = path.with_name("digests")
+    with download_archive(
+        url, path, "corpus", keep_cache=False, digests=digests
+    ) as root:
+        assert (root / "a.txt").read_text() == "a"
+        (root / "a.txt").extract()
+    assert not path.exists()
+    assert not path.with_name(path.name + ".d").exists()
+    assert neighbour.read_text() == "kept"
+
+
+CHECKS: list[tuple[str, Callable[[Server, str, Path], None]]] = [
+    ("fresh download", check_fresh),
+    ("interrupted twice, resumed", check_interrupted),
+    ("resume from a .part file", check_partial_file),
+    ("complete .part, 416", check_complete_part),
+    ("Range ignored, restarted", check_range_ignored),
+    ("sha256 verified", check_sha256),
+    ("sha256 mismatch", check_sha256_mismatch),
+    ("recorded digest changed", check_recorded_digest),
+    ("retries exhausted", check_retries_exhausted),
+    ("keep_cache=False cleanup", check_archive_cleanup),
+]
+
+
+def main(size: int = typer.Option(1 << 20, help="Payload size in bytes.")):
+    """Check resume, 416 handling, retries, checksums and archive cleanup."""
+    table = Table(title="Downloader checks")
+    for column in ("check", "requests", "status"):
+        table.add_column(column)
+    failures = []
+    payload = os.urandom(size)
+    for name, check in CHECKS:
+        with serve(payload) as server, tempfile.TemporaryDirectory() as directory:
+            url = f"http://127.0.0.1:{server.server_address[1]}/archive.zip"
+            try:
+                check(server, url, Path(directory) / "archive.zip")
+                status = "ok"
+            except Exception as error:
+                failures.append(name)
+                status = f"[red]{type(error).__name__}: {error}[/red]"
+            table.add_row(name, str(len(server.ranges)), status)
+    print(table)
+    if failures:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,359 @@
+"""Synthetic inputs in the layout each converter expects in its `cache_dir`.
+
+Every generator writes a source that looks already downloaded or cloned, so
+`write(sink, cache_dir=...)` runs offline. Sizes scale linearly with `scale`.
+"""
+
+import io
+import json
+import random
+import zipfile
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+
+from tos_datasets.claudette import TAGS as CLAUDETTE_TAGS
+from tos_datasets.converters.memnet_tos import TAGS as MEMNET_TAGS
+
+WORDS = (
+    "the service may terminate your account at any time without notice we "
+    "collect personal data including email address and location to provide "
+    "improve and personalize our services you agree that any dispute shall be "
+    "resolved by binding arbitration under the laws of the state of california"
+).split()
+
+
+def sentence(rng: random.Random, low: int = 8, high: int = 30) -> str:
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(1, sentences)))
+
+
+def count(base: int, scale: float) -> int:
+    return max(1, round(base * scale))
+
+
+def cuad(cache_dir: Path, scale: float, rng: random.Random):
+    categories = ["Agency", "Service", "License", "Supply"]
+    data = []
+    with zipfile.ZipFile(cache_dir / "CUAD_v1.zip", "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(count(200, scale)):
+            title = f"Contract{i}"
+            text = "\n\n".join(paragraph(rng, 8) for _ in range(40))
+            qas = []
+            for j, category in enumerate(
+                ["Parties", "Governing Law", "Cap On Liability"]
+            ):
+                start = rng.randrange(len(text) - 50)
+                answers = [{"text": text[start : start + 40], "answer_start": start}]
+                qas.append(
+                    {
+                        "id": f"{title}__{category}",
+                        "is_impossible": j == 2,
+                        "answers": [] if j == 2 else answers,
+                    }
+                )
+            data.append({"title": title, "paragraphs": [{"context": text, "qas": qas}]})
+            z.writestr(f"CUAD_v1/full_contract_txt/{title}.txt", text)
+            category = categories[i % len(categories)]
+            z.writestr(f"CUAD_v1/full_contract_pdf/Part_I/{category}/{title}.pdf", b"")
+        z.writestr("CUAD_v1/CUAD_v1.json", json.dumps({"data": data}))
+
+
+def one_hundred_tos(cache_dir: Path, scale: float, rng: random.Random):
+    import fitz
+
+    root = "Annotated Terms of Service of 100 Online Platforms"
+    codes = [f"V{i}" for i in range(20)]
+    definitions = pd.DataFrame(
+        [
+            {
+                "General category": "Category",
+                "Variable name": f"Variable {code}",
+                "Legal ground": "Directive 93/13/EEC",
+                "Code": code,
+                "Score": score,
+                "Detailed description": sentence(rng),
+            }
+            for code in codes
+            for score in (-1, 0, 1)
+        ]
+    )
+    excel = io.BytesIO()
+    definitions.to_excel(excel, index=False)
+    services = [f"service{i}" for i in range(count(40, scale))]
+    results = pd.DataFrame(
+        {
+            "name": services,
+            "url": [f"https://{name}.example/terms" for name in services],
+            "date": "2022-01-01",
+            "lang": "en",
+            "sector": "Social",
+            "hq": "US",
+            "hq_cat": "Non-EU",
+            "public": "yes",
+            "paid": "no",
+        }
+        | {code: [rng.choice((-1, 0, 1)) for _ in services] for code in codes}
+    )
+    with zipfile.ZipFile(cache_dir / "100_tos.zip", "w") as z:
+        z.writestr(
+            f"{root}/Terms of Service Analysis and Evaluation_RESULTS.csv",
+            results.to_csv(sep=";", index=False),
+        )
+        z.writestr(f"{root}/Variables Definitions.xlsx", excel.getvalue())
+        for name in services:
+            with fitz.open() as pdf:
+                for _ in range(5):
+                    page = pdf.new_page()
+                    page.insert_textbox(
+                        page.rect + (36, 36, -36, -36), paragraph(rng, 30)
+                    )
+                z.writestr(f"{root}/Clear ToS/{name}.pdf", pdf.tobytes())
+
+
+def claudette_document(rng: random.Random, tags: list[str]) -> tuple[str, str]:
+    lines = [sentence(rng) for _ in range(rng.randint(50, 150))]
+    labels = [" ".join(rng.sample(tags, rng.choice((0, 0, 0, 1, 2)))) for _ in lines]
+    # One line per sentence, even when the last one has no tag
+    return "\n".join(lines), "".join(f"{label}\n" for label in labels)
+
+
+def one_hundred_forty_two_tos(cache_dir: Path, scale: float, rng: random.Random):
+    unfair = [tag for tag in CLAUDETTE_TAGS[:27] if not tag.endswith("1")]
+    with zipfile.ZipFile(cache_dir / "142_tos.zip", "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("corpus/lists/list_tags.txt", " ".join(unfair))
+        for i in range(count(142, scale)):
+            text, tags = claudette_document(rng, unfair)
+            z.writestr(f"corpus/sentences/Company{i}.txt", text)
+            z.writestr(f"corpus/tags_unfair/Company{i}.txt", tags)
+
+
+def memnet_tos(cache_dir: Path, scale: float, rng: random.Random):
+    kb = cache_dir / "local_database" / "KB"
+    kb.mkdir(parents=True)
+    for tag in MEMNET_TAGS:
+        (kb / f"{tag}_KB.txt").write_text("\n".join(sentence(rng) for _ in range(8)))
+    rows = []
+    for doc in range(count(100, scale)):
+        for i in range(rng.randint(50, 150)):
+            row = {
+                "document_ID": doc,
+                "document": f"doc{doc}",
+                "text": sentence(rng),
+            } | {tag: int(rng.random() < 0.05) for tag in MEMNET_TAGS}
+            for tag in ("TER", "LTD", "A", "CH", "CR"):
+                if row[tag]:
+                    row[f"{tag}_targets"] = str(rng.sample(range(8), 2)).replace(
+                        " ", ""
+                    )
+            rows.append(row)
+    corpus = cache_dir / "local_database" / "ToS_100"
+    corpus.mkdir(parents=True)
+    pd.DataFrame(rows).to_csv(corpus / "dataset.csv")
+
+
+def multilingual_unfair_clause(cache_dir: Path, scale: float, rng: random.Random):
+    for language in ("en", "de", "it", "pl"):
+        sentences = cache_dir / "corpus" / "sentences" / language / "original"
+        tags = cache_dir / "corpus" / "tags" / language / "original"
+        sentences.mkdir(parents=True)
+        tags.mkdir(parents=True)
+        for i in range(count(25, scale)):
+            text, labels = claudette_document(rng, CLAUDETTE_TAGS[:27])
+            (sentences / f"Company{i}.txt").write_text(text)
+            (tags / f"Company{i}.txt").write_text(labels)
+
+
+def ten_tos(cache_dir: Path, scale: float, rng: random.Random):
+    for language in ("en", "de", "it", "pl"):
+        tags = cache_dir / "corpus" / "tags" / language / "original" / "BOTH"
+        tags.mkdir(parents=True)
+        for doc_type in ("TOS", "PP"):
+            sentences = cache_dir / "corpus" / "sentences" / language / "original"
+            (sentences / doc_type).mkdir(parents=True)
+            for i in range(count(10, scale)):
+                text, labels = claudette_document(rng, CLAUDETTE_TAGS)
+                (sentences / doc_type / f"Company{i}.{doc_type}.txt").write_text(text)
+                (tags / f"Company{i}.{doc_type}.txt").write_text(labels)
+
+
+def policy_qa(cache_dir: Path, scale: float, rng: random.Random):
+    (cache_dir / "data").mkdir(parents=True)
+    for split, policies in (("train", 80), ("dev", 10), ("test", 10)):
+        data = []
+        for i in range(count(policies, scale)):
+            paragraphs = []
+            for _ in range(30):
+                context = paragraph(rng)
+                qas = []
+                for q in range(rng.randint(0, 4)):
+                    start = rng.randrange(len(context) - 10)
+                    text = context[start : start + 10]
+                    qas.append(
+                        {
+                            "id": f"{split}{i}_{q}",
+                            "question": sentence(rng, 4, 10),
+                            "answers": [{"text": text, "answer_start": start}],
+                        }
+                    )
+                paragraphs.append({"context": context, "qas": qas})
+            data.append({"title": f"{split}_policy{i}", "paragraphs": paragraphs})
+        (cache_dir / "data" / f"{split}.json").write_text(
+            json.dumps({"version": "1.0", "data": data})
+        )
+
+
+def policy_ie(cache_dir: Path, scale: float, rng: random.Random):
+    (cache_dir / "data").mkdir(parents=True)
+    path = cache_dir / "data" / "sanitized_split.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for split, policies in (("train", 80), ("test", 20)):
+            for i in range(count(policies, scale)):
+                for j in range(rng.randint(5, 30)):
+                    text = paragraph(rng)
+
+                    def span() -> tuple[int, int]:
+                        start = rng.randrange(len(text) - 10)
+                        return start, start + rng.randint(1, 10)
+
+                    entities = []
+                    for _ in range(rng.randint(0, 4)):
+                        start, end = span()
+                        entities.append(
+                            {
+                                "entity/argument_type": "data-collected",
+                                "start_idx": start,
+                                "end_idx": end,
+                                "entity/argument_text": text[start:end],
+                            }
+                        )
+                    events = []
+                    for _ in range(rng.randint(0, 2)):
+                        start, end = span()
+                        arguments = []
+                        for _ in range(rng.randint(1, 3)):
+                            arg_start, arg_end = span()
+                            arguments.append(
+                                {
+                                    "type": "data-collected",
+                                    "role": "data-collected",
+                                    "start_idx": arg_start,
+                                    "end_idx": arg_end,
+                                }
+                            )
+                        events.append(
+                            {
+                                "event_type": "data-collection-usage",
+                                "trigger": {"start_idx": start, "end_idx": end},
+                                "arguments": arguments,
+                            }
+                        )
+                    z.writestr(
+                        f"sanitized_split/{split}/policy{i}/{j}.json",
+                        json.dumps(
+                            {
+                                "text": text,
+                                "entity/argument_mentions": entities,
+                                "event_mentions": events,
+                            }
+                        ),
+                    )
+
+
+def policy_detection(cache_dir: Path, scale: float, rng: random.Random):
+    (cache_dir / "data").mkdir(parents=True)
+    n = count(1301, scale)
+    pd.DataFrame(
+        {
+            "link_text": [f"Privacy Policy {i}" for i in range(n)],
+            "policy_text": [
+                "\n".join(paragraph(rng) for _ in range(20)) for _ in range(n)
+            ],
+            "is_policy": [rng.random() < 0.8 for _ in range(n)],
+        }
+    ).to_csv(cache_dir / "data" / "1301_dataset.csv.xz")
+
+
+def polisis(cache_dir: Path, scale: float, rng: random.Random):
+    labels = [f"Label{i}" for i in range(10)]
+    for split, sentences in (("train", 4000), ("validation", 500), ("test", 500)):
+        rows = [sentence(rng) for _ in range(count(sentences, scale))]
+        for folder in ("Majority", "Union"):
+            directory = cache_dir / "datasets" / folder
+            directory.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(
+                [
+                    (text, label)
+                    for text in rows
+                    for label in rng.sample(labels, rng.randint(1, 3))
+                ]
+            ).to_csv(directory / f"{split}_dataset.csv", header=False, index=False)
+
+
+def privacy_qa(cache_dir: Path, scale: float, rng: random.Random):
+    (cache_dir / "data").mkdir(parents=True)
+    for split, docs in (("train", 30), ("test", 8)):
+        rows = []
+        for doc in range(count(docs, scale)):
+            segments = [sentence(rng) for _ in range(rng.randint(50, 150))]
+            for query in range(rng.randint(5, 20)):
+                text = sentence(rng, 4, 12)
+                for segment in segments:
+                    label = "Relevant" if rng.random() < 0.1 else "Irrelevant"
+                    rows.append(
+                        {
+                            "DocID": f"doc{doc}",
+                            "QueryID": f"doc{doc}_q{query}",
+                            "Query": text,
+                            "Segment": segment,
+                            "Label" if split == "train" else "Any_Relevant": label,
+                        }
+                    )
+        pd.DataFrame(rows).to_csv(
+            cache_dir / "data" / f"policy_{split}_data.csv", sep="\t", index=False
+        )
+
+
+def piextract(cache_dir: Path, scale: float, rng: random.Random):
+    for task in ("CollectionPolicy", "SharingPolicy"):
+        directory = cache_dir / "dataset" / task
+        directory.mkdir(parents=True)
+        for split, sentences in (("train", 4000), ("validation", 500), ("test", 500)):
+            lines = ["-DOCSTART- -X- -X- O", ""]
+            for _ in range(count(sentences, scale)):
+                tokens = sentence(rng)[:-1].split() + ["."]
+                if rng.random() < 0.1:
+                    tokens = ["``", *tokens[:-1], "''", "."]
+                for token in tokens:
+                    tag = rng.choice(("O", "O", "O", "B-DATA", "I-DATA"))
+                    lines.append(f"{token} _ _ {tag}")
+                lines.append("")
+            (directory / f"{split}.conll03").write_text("\n".join(lines))
+
+
+FIXTURES: dict[str, Callable[[Path, float, random.Random], None]] = {
+    "cuad": cuad,
+    "100_tos": one_hundred_tos,
+    "142_tos": one_hundred_forty_two_tos,
+    "memnet_tos": memnet_tos,
+    "multilingual_unfair_clause": multilingual_unfair_clause,
+    "10_tos": ten_tos,
+    "privacy_glue/policy_qa": policy_qa,
+    "privacy_glue/policy_ie": policy_ie,
+    "privacy_glue/policy_detection": policy_detection,
+    "privacy_glue/polisis": polisis,
+    "privacy_glue/privacy_qa": privacy_qa,
+    "privacy_glue/piextract": piextract,
+}
+
+
+def generate(name: str, cache_dir: Path, scale: float = 1.0, seed: int = 0) -> int:
+    """Write the synthetic source of subset `name`, returning its size in bytes."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    FIXTURES[name](cache_dir, scale, random.Random(seed))
+    return sum(f.stat().st_size for f in cache_dir.rglob("*") if f.is_file())
@@ -0,0 +1,88 @@
+"""Guard the import time of the package and the start-up of the CLI.
+
+    python benchmarks/imports.py
+
+Each check runs in a fresh interpreter, takes the best of `--repeat` runs
+and fails when it exceeds its budget or loads one of the heavy dependencies
+that only conversion stages need.
+"""
+
+import json
+import subprocess
+import sys
+
+import typer
+from rich import print
+from rich.table import Table
+
+# Dependencies that must load only inside the stage that uses them
+HEAVY = ["datasets", "pandas", "pyarrow", "numpy", "git", "fitz", "nltk", "requests"]
+
+# Name, statement and budget in seconds, interpreter start-up excluded
+CHECKS = [
+    ("import tos_datasets.proto", "import tos_datasets.proto", 0.5),
+    ("import tos_datasets.registry", "import tos_datasets.registry", 0.3),
+    ("import tos_datasets.reader", "import tos_datasets.reader", 0.5),
+    ("import tos_datasets.cli", "import tos_datasets.cli", 0.6),
+    (
+        "tos-datasets --help",
+        "from tos_datasets.cli import app; app(['--help'])",
+        0.7,
+    ),
+    ("tos-datasets list", "from tos_datasets.cli import app; app(['list'])", 0.7),
+]
+
+PROBE = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        {statement}
+    except SystemExit:
+        pass
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+
+def probe(statement: str) -> tuple[float, set[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    return result["seconds"], {name.split(".")[0] for name in result["modules"]}
+
+
+def main(
+    repeat: int = typer.Option(5, help="Runs per check, the fastest one counts."),
+    scale: float = typer.Option(1.0, help="Multiplier of every budget."),
+):
+    """Check import and CLI start-up times against their budgets."""
+    table = Table(title="Import budgets")
+    for column in ("check", "seconds", "budget", "heavy modules", "status"):
+        table.add_column(column, justify="right" if column != "check" else "left")
+    failures = []
+    for name, statement, budget in CHECKS:
+        runs = [probe(statement) for _ in range(repeat)]
+        seconds = min(seconds for seconds, _ in runs)
+        heavy = sorted(set(HEAVY) & runs[0][1])
+        ok = seconds <= budget * scale and not heavy
+        if not ok:
+            failures.append(name)
+        table.add_row(
+            name,
+            f"{seconds:.3f}",
+            f"{budget * scale:.3f}",
+            ", ".join(heavy) or "-",
+            "ok" if ok else "[red]over[/red]",
+        )
+    print(table)
+    if failures:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
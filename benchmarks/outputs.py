@@ -0,0 +1,95 @@
+"""Check that every converted subset reloads with its rows and metadata.
+
+    python benchmarks/outputs.py --scale 0.05
+
+Each subset is converted from its `fixtures.py` source into Parquet shards,
+as `tos-datasets build` does, and loaded back. A check fails when a split's
+row count or features differ from what was written, when a row does not
+validate as the subset's proto model, or when a CLAUDETTE subset's label
+definitions are missing from its output or do not cover its labels.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import typer
+from fixtures import FIXTURES, generate
+from rich import print
+from rich.table import Table
+
+from tos_datasets import claudette, sink
+from tos_datasets.reader import load
+from tos_datasets.registry import SUBSETS
+
+# Subsets whose sentence labels are defined once, next to the shards
+CLAUDETTE = {"142_tos", "10_tos", "multilingual_unfair_clause"}
+# Arguments that make a build convert its whole synthetic source
+BUILD_KWARGS = {"cuad": {"target": "all"}}
+
+
+def check(name: str, workdir: Path) -> dict[str, int]:
+    """Convert `name` from `workdir` and reload it, returning its split sizes."""
+    subset = SUBSETS[name]
+    directory = workdir / "output"
+    with sink.ParquetSink(directory, subset.features) as shards:
+        subset.write(shards, cache_dir=workdir, **BUILD_KWARGS.get(name, {}))
+    written = dict(shards.records)
+    dataset = sink.load(directory)
+    assert {split: len(ds) for split, ds in dataset.items()} == written
+    for split, ds in dataset.items():
+        assert ds.features == subset.features, f"{split}: features differ"
+        # Every row decodes as the subset's model
+        rows = list(load(name, split, path=directory))
+        assert len(rows) == written[split]
+
+    files = {path.name for path in sink.attachments(directory)}
+    if name not in CLAUDETTE:
+        assert not files, f"unexpected files {files}"
+        return written
+    assert files == {claudette.DEFINITIONS_FILE}, f"attached files {files}"
+    table = claudette.read_definitions(directory)
+    assert all(
+        definition == claudette.definitions([tag])[0]
+        for tag, definition in table.items()
+    )
+    labels = {
+        label
+        for ds in dataset.values()
+        for row in ds
+        for classification in row["classifications"]
+        for label in classification["labels"]
+    }
+    assert labels <= table.keys(), f"undefined labels {labels - table.keys()}"
+    return written
+
+
+def main(
+    subsets: str = typer.Option("all", help="Comma-separated subset names, or `all`."),
+    scale: float = typer.Option(0.05, help="Multiplier of the fixture sizes."),
+    seed: int = 0,
+):
+    """Convert synthetic sources, reload the shards and compare them."""
+    names = list(FIXTURES) if subsets == "all" else subsets.split(",")
+    table = Table(title="Reloaded outputs")
+    for column in ("subset", "splits", "status"):
+        table.add_column(column, overflow="fold")
+    failures = []
+    for name in names:
+        workdir = Path(tempfile.mkdtemp(prefix="tos_datasets_outputs_"))
+        try:
+            generate(name, workdir, scale, seed)
+            splits = check(name, workdir)
+            table.add_row(name, ", ".join(f"{k}={v}" for k, v in splits.items()), "ok")
+        except Exception as error:
+            failures.append(name)
+            table.add_row(name, "-", f"[red]{type(error).__name__}: {error}[/red]")
+        finally:
+            shutil.rmtree(workdir)
+    print(table)
+    if failures:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,146 @@
+"""Benchmark every converter offline on synthetic sources.
+
+    python benchmarks/run.py --scale 1 --output benchmarks.json
+    python benchmarks/run.py --baseline benchmarks.json
+
+Each subset is generated by `fixtures.py` into a temporary `cache_dir` and
+converted in a fresh process. Processes are forked from a server started
+before any fixture is generated, as Linux carries the peak RSS of a parent
+over to its children. The converters' own pools are forked from that
+process, as under `tos-datasets build`, rather than started by the server
+with a fresh import of `datasets` and `pandas` in every worker.
+"""
+
+import inspect
+import json
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import forkserver
+from pathlib import Path
+
+import typer
+from fixtures import FIXTURES, generate
+from rich import print
+from rich.table import Table
+
+# Arguments that make a build convert its whole synthetic source
+BUILD_KWARGS = {"cuad": {"target": "all"}}
+
+
+def measure(name: str, cache_dir: Path, jobs: int | None) -> dict:
+    """Build one subset from `cache_dir` and report its time and memory."""
+    from tos_datasets import instrument
+    from tos_datasets.registry import SUBSETS
+    from tos_datasets.sink import ParquetSink
+
+    # Children of the server inherit its start method, which `istarmap` would use
+    if "fork" in multiprocessing.get_all_start_methods():
+        multiprocessing.set_start_method("fork", force=True)
+    subset = SUBSETS[name]
+    kwargs = {"cache_dir": cache_dir, **BUILD_KWARGS.get(name, {})}
+    if "jobs" in inspect.signature(subset.write).parameters:
+        kwargs["jobs"] = jobs
+    path = cache_dir / "report.json"
+    with instrument.report(name, path):
+        with instrument.stage("build") as stage:
+            with ParquetSink(cache_dir / "output", subset.features) as shards:
+                subset.write(shards, **kwargs)
+            stage.records = sum(shards.records.values())
+    return json.loads(path.read_text())
+
+
+def run(
+    subsets: str = typer.Option("all", help="Comma-separated subset names, or `all`."),
+    scale: float = typer.Option(1.0, help="Multiplier of the fixture sizes."),
+    jobs: int = typer.Option(1, help="`jobs` of the converters that take it."),
+    seed: int = 0,
+    output: Path = typer.Option(None, help="Write the results as JSON."),
+    baseline: Path = typer.Option(None, help="Compare with a previous `--output`."),
+    tolerance: float = typer.Option(
+        0.2, help="Relative docs/sec drop from the baseline that fails the run."
+    ),
+):
+    """Convert synthetic sources and report docs/sec, MB/sec and peak RSS."""
+    names = list(FIXTURES) if subsets == "all" else subsets.split(",")
+    previous = json.loads(baseline.read_text()) if baseline else {}
+    context = multiprocessing.get_context("forkserver")
+    forkserver.ensure_running()
+    results = {}
+    for name in names:
+        workdir = Path(tempfile.mkdtemp(prefix="tos_datasets_bench_"))
+        try:
+            start = time.perf_counter()
+            size = generate(name, workdir, scale, seed)
+            print(
+                f"{name}: {size / 1e6:.1f} MB generated in {time.perf_counter() - start:.1f}s"
+            )
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                report = pool.submit(measure, name, workdir, jobs).result()
+        finally:
+            shutil.rmtree(workdir)
+        build = next(stage for stage in report["stages"] if stage["name"] == "build")
+        results[name] = {
+            "records": build["records"],
+            "megabytes": size / 1e6,
+            "seconds": build["seconds"],
+            "cpu_seconds": build["cpu_seconds"],
+            "docs_per_second": build["records"] / build["seconds"],
+            "mb_per_second": size / 1e6 / build["seconds"],
+            "peak_rss_mb": build["peak_rss_mb"],
+            "stages": report["stages"],
+        }
+
+    table = Table(title=f"Converters at scale {scale}, jobs={jobs}")
+    for column in (
+        "subset",
+        "records",
+        "MB",
+        "seconds",
+        "docs/s",
+        "MB/s",
+        "peak RSS MB",
+    ):
+        if column == "subset":
+            table.add_column(column, overflow="fold")
+        else:
+            table.add_column(column, justify="right")
+    if previous:
+        table.add_column("vs baseline", justify="right")
+    regressions = []
+    for name, result in results.items():
+        row = [
+            name,
+            str(result["records"]),
+            f"{result['megabytes']:.1f}",
+            f"{result['seconds']:.2f}",
+            f"{result['docs_per_second']:.0f}",
+            f"{result['mb_per_second']:.2f}",
+            f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] else "-",
+        ]
+        if previous:
+            if name in previous:
+                ratio = result["docs_per_second"] / previous[name]["docs_per_second"]
+                if ratio < 1 - tolerance:
+                    regressions.append(name)
+                row.append(
+                    f"[red]{ratio:.2f}x[/red]"
+                    if name in regressions
+                    else f"{ratio:.2f}x"
+                )
+            else:
+                row.append("-")
+        table.add_row(*row)
+    print(table)
+
+    if output:
+        output.write_text(json.dumps(results, indent=2))
+    if regressions:
+        print(f"[red]Slower than the baseline: {', '.join(regressions)}[/red]")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(run)
@@ -1,2 +1,14 @@
+__all__ = ["Reader", "load"]
+
+
 def hello() -> str:
     return "Hello from privacy-datasets!"
+
+
+def __getattr__(name: str):
+    # `datasets` and the proto models load on first use, see `reader`
+    if name in __all__:
+        from tos_datasets import reader
+
+        return getattr(reader, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,32 @@
+from collections.abc import Iterable, Mapping
+
+# Tokens that `TreebankWordDetokenizer` rewrites in its output
+TREEBANK_ALIASES = {"``": '"', "''": '"'}
+
+
+def align(
+    tokens: Iterable[str],
+    text: str,
+    aliases: Mapping[str, str] = TREEBANK_ALIASES,
+) -> list[tuple[int, int]]:
+    """Map tokens to their `(start, end)` character offsets in `text`.
+
+    Tokens are matched left to right, each searched from the end of the
+    previous one, so a sentence is aligned in a single pass over `text`. A
+    token missing from the text is retried under its alias, such as the
+    opening quote the detokenizer turns into `"`.
+
+    Raises a `ValueError` when a token cannot be found after its predecessor.
+    """
+    spans = []
+    position = 0
+    for token in tokens:
+        start = text.find(token, position)
+        if start < 0 and token in aliases:
+            token = aliases[token]
+            start = text.find(token, position)
+        if start < 0:
+            raise ValueError(f"Token {token!r} not found after offset {position}")
+        position = start + len(token)
+        spans.append((start, position))
+    return spans
@@ -0,0 +1,184 @@
+import io
+import os
+import posixpath
+import shutil
+import zipfile
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import IO, Iterator
+
+
+def _match(parts: list[str], pattern: list[str]) -> bool:
+    if not pattern:
+        return not parts
+    if pattern[0] == "**":
+        return any(_match(parts[i:], pattern[1:]) for i in range(len(parts) + 1))
+    return (
+        bool(parts)
+        and fnmatchcase(parts[0], pattern[0])
+        and _match(parts[1:], pattern[1:])
+    )
+
+
+class Archive:
+    """A read-only zip file whose members are read in place.
+
+    Member names are indexed once, so globbing and existence checks never touch
+    the disk. Use `archive / "some/dir"` to get an `ArchivePath`. An archive is
+    pickled as its path and reopened once per process, see `open_archive`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        self.files: dict[str, zipfile.ZipInfo] = {}
+        self.dirs: set[str] = {""}
+        for info in self.zip.infolist():
+            name = info.filename.rstrip("/")
+            if not info.is_dir():
+                self.files[name] = info
+            # Directories are often implied by their members only
+            parent = name if info.is_dir() else posixpath.dirname(name)
+            while parent not in self.dirs:
+                self.dirs.add(parent)
+                parent = posixpath.dirname(parent)
+        self.names = sorted(self.files.keys() | self.dirs - {""})
+        # Where members that need a real file are extracted, see `ArchivePath.extract`
+        self.extract_dir = path.with_name(path.name + ".d")
+
+    def __truediv__(self, at: str) -> "ArchivePath":
+        return ArchivePath(self, "") / at
+
+    def __reduce__(self):
+        return open_archive, (self.path,)
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the file, and the handle `open_archive` keeps for its path."""
+        self.zip.close()
+        cached = _OPEN.pop((self.path, os.getpid()), None)
+        if cached is not None and cached[1] is not self:
+            cached[1].close()
+
+
+# The archives of `open_archive` by path and process id, with the identity of
+# the file they were opened from
+_OPEN: dict[tuple[Path, int], tuple[tuple[int, int, int], Archive]] = {}
+
+
+def open_archive(path: Path) -> Archive:
+    """One `Archive` per process, reused across the members read from it.
+
+    Forked workers must not share the parent's file handle, whose offset would
+    move under them, so archives are cached per process id. A file replaced at
+    the same path, e.g. by a fresh clone, is reopened and the old handle closed.
+    """
+    stat = path.stat()
+    identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    key = (path, os.getpid())
+    cached = _OPEN.get(key)
+    if cached is not None:
+        if cached[0] == identity:
+            return cached[1]
+        cached[1].close()
+    archive = Archive(path)
+    _OPEN[key] = (identity, archive)
+    return archive
+
+
+@dataclass(frozen=True)
+class ArchivePath:
+    """A `pathlib`-like path to a member of an `Archive`."""
+
+    archive: Archive
+    at: str
+
+    def __truediv__(self, other: str) -> "ArchivePath":
+        return ArchivePath(self.archive, posixpath.join(self.at, other).strip("/"))
+
+    def __str__(self) -> str:
+        return posixpath.join(str(self.archive.path), self.at)
+
+    @property
+    def name(self) -> str:
+        return posixpath.basename(self.at)
+
+    @property
+    def suffix(self) -> str:
+        return posixpath.splitext(self.name)[1]
+
+    @property
+    def stem(self) -> str:
+        return posixpath.splitext(self.name)[0]
+
+    @property
+    def parent(self) -> "ArchivePath":
+        return ArchivePath(self.archive, posixpath.dirname(self.at))
+
+    def exists(self) -> bool:
+        return self.is_file() or self.is_dir()
+
+    def is_file(self) -> bool:
+        return self.at in self.archive.files
+
+    def is_dir(self) -> bool:
+        return self.at in self.archive.dirs
+
+    def _descendants(self) -> Iterator[str]:
+        prefix = self.at + "/" if self.at else ""
+        for name in self.archive.names:
+            if name.startswith(prefix):
+                yield name[len(prefix) :]
+
+    def iterdir(self) -> Iterator["ArchivePath"]:
+        for relative in self._descendants():
+            if "/" not in relative:
+                yield self / relative
+
+    def glob(self, pattern: str) -> Iterator["ArchivePath"]:
+        """Members matching `pattern`, in name order. `**` spans directories."""
+        pattern_parts = pattern.split("/")
+        for relative in self._descendants():
+            if _match(relative.split("/"), pattern_parts):
+                yield self / relative
+
+    def open(self, mode: str = "r", encoding: str | None = None) -> IO:
+        if mode not in ("r", "rb"):
+            raise ValueError(f"{self} is read-only, got mode {mode!r}")
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        binary = self.archive.zip.open(self.at)
+        if mode == "rb":
+            return binary
+        return io.TextIOWrapper(binary, encoding=encoding)
+
+    def read_bytes(self) -> bytes:
+        with self.open("rb") as f:
+            return f.read()
+
+    def read_text(self, encoding: str | None = None) -> str:
+        with self.open("r", encoding=encoding) as f:
+            return f.read()
+
+    def extract(self) -> Path:
+        """Extract this member once, for readers that need a seekable file."""
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        target = self.archive.extract_dir / self.at
+        if (
+            target.exists()
+            and target.stat().st_size == self.archive.files[self.at].file_size
+        ):
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".part")
+        with self.open("rb") as src, open(partial, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        partial.replace(target)
+        return target
@@ -0,0 +1,168 @@
+import inspect
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+from tos_datasets import cache, instrument, sink
+from tos_datasets.parallel import workers
+from tos_datasets.registry import HUB_REPO, SUBSETS
+
+
+def report_path(output_dir: Path, name: str) -> Path:
+    """Where the stage report of a subset build is written."""
+    return output_dir / "reports" / f"{name}.json"
+
+
+@dataclass
+class BuildResult:
+    subset: str
+    seconds: float
+    records: dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BuildSummary:
+    results: list[BuildResult]
+    seconds: float
+
+    @property
+    def failures(self) -> list[BuildResult]:
+        return [result for result in self.results if not result.ok]
+
+
+def build_subset(
+    name: str,
+    output_dir: Path,
+    keep_cache: bool = True,
+    push_to_hub: bool = False,
+    use_cache: bool = True,
+    cache_root: Path = cache.BUILD_CACHE,
+    profile: str | None = None,
+    jobs: int | None = None,
+    compact: bool = False,
+) -> BuildResult:
+    """Convert one subset and write it as Parquet shards under `output_dir / name`.
+
+    Records are streamed from the converter into the shards. `jobs`, all
+    cores when None, and `compact` are passed to the converters that take
+    them. When the subset's
+    source, converter code and schema are unchanged since a previous build,
+    the shards are copied from `cache_root` instead. The time and memory of
+    every stage are written to `output_dir / "reports" / f"{name}.json"`, with
+    cProfile stats for the `profile` stage next to it.
+    """
+    start = time.perf_counter()
+    logger.info(f"{name}: started")
+    subset = SUBSETS[name]
+    directory = output_dir / name
+    parameters = inspect.signature(subset.write).parameters
+    # Options that change the records, and so the cache key
+    options = {"compact": compact} if "compact" in parameters else {}
+    kwargs = {"keep_cache": keep_cache, **options}
+    if "jobs" in parameters:
+        kwargs["jobs"] = jobs
+    try:
+        with instrument.report(name, report_path(output_dir, name), profile):
+            with instrument.stage("fingerprint"):
+                key = cache.fingerprint(subset, **options) if use_cache else None
+            cached = False
+            if key is not None:
+                with instrument.stage("cache"):
+                    cached = cache.restore(name, key, directory, cache_root)
+            if not cached:
+                with instrument.stage("build") as stage:
+                    with sink.ParquetSink(directory, subset.features) as shards:
+                        subset.write(shards, **kwargs)
+                    stage.records = sum(shards.records.values())
+                key = cache.fingerprint(subset, **options) if use_cache else None
+                if key is not None:
+                    with instrument.stage("store"):
+                        cache.store(name, key, directory, cache_root)
+            if push_to_hub:
+                with instrument.stage("push"):
+                    sink.push(directory, HUB_REPO, name)
+    except Exception:
+        return BuildResult(
+            name, time.perf_counter() - start, error=traceback.format_exc()
+        )
+
+    records = sink.count(directory)
+    return BuildResult(name, time.perf_counter() - start, records, cached=cached)
+
+
+def build_all(
+    names: list[str],
+    output_dir: Path,
+    jobs: int = 1,
+    keep_cache: bool = True,
+    push_to_hub: bool = False,
+    use_cache: bool = True,
+    cache_root: Path = cache.BUILD_CACHE,
+    profile: str | None = None,
+    compact: bool = False,
+) -> BuildSummary:
+    """Build independent subsets concurrently, one process per subset.
+
+    The cores are split between the subsets built at the same time, so that
+    converters with their own process pool do not oversubscribe the machine.
+    """
+    start = time.perf_counter()
+    concurrent = max(1, min(jobs, len(names)))
+    converter_jobs = max(1, workers() // concurrent)
+    results = []
+
+    def report(result: BuildResult):
+        results.append(result)
+        progress = f"[{len(results)}/{len(names)}] {result.subset}"
+        if result.ok:
+            logger.info(
+                f"{progress}: {sum(result.records.values())} records "
+                f"in {result.seconds:.1f}s{' (cached)' if result.cached else ''}"
+            )
+        else:
+            logger.error(f"{progress}: failed after {result.seconds:.1f}s")
+            logger.error(result.error)
+
+    args = (
+        output_dir,
+        keep_cache,
+        push_to_hub,
+        use_cache,
+        cache_root,
+        profile,
+        converter_jobs,
+        compact,
+    )
+    if concurrent == 1:
+        for name in names:
+            report(build_subset(name, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=concurrent) as pool:
+            futures = {
+                pool.submit(build_subset, name, *args): (
+                    name,
+                    time.perf_counter(),
+                )
+                for name in names
+            }
+            for future in as_completed(futures):
+                name, submitted = futures[future]
+                try:
+                    report(future.result())
+                except Exception:
+                    seconds = time.perf_counter() - submitted
+                    report(BuildResult(name, seconds, error=traceback.format_exc()))
+
+    order = {name: i for i, name in enumerate(names)}
+    results.sort(key=lambda result: order[result.subset])
+    return BuildSummary(results, time.perf_counter() - start)
@@ -0,0 +1,115 @@
+import ast
+import hashlib
+import json
+import shutil
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+from tos_datasets.download import sha256_file
+from tos_datasets.registry import Subset
+
+BUILD_CACHE = Path.home() / ".cache" / "tos_datasets" / "builds"
+PACKAGE = "tos_datasets"
+
+
+def source_fingerprint(path: Path) -> str | None:
+    """The HEAD commit of a cloned repository or the hash of a downloaded file."""
+    from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+
+    if path.is_file():
+        return f"sha256:{sha256_file(path)}"
+    try:
+        return f"git:{Repo(path).head.commit.hexsha}"
+    except (InvalidGitRepositoryError, NoSuchPathError, ValueError):
+        return None
+
+
+def _source(module: str) -> Path | None:
+    """The file of a package module, located without importing its parents."""
+    *parents, name = module.split(".")[1:]
+    directory = Path(find_spec(PACKAGE).origin).parent.joinpath(*parents)
+    for path in (directory / f"{name}.py", directory / name / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _imports(path: Path) -> set[str]:
+    """The package modules imported anywhere in `path`, lazily or not."""
+    found = set()
+    for node in ast.walk(ast.parse(path.read_bytes())):
+        if isinstance(node, ast.Import):
+            found.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            found.add(node.module)
+            # `from tos_datasets import cache` names a module, not an attribute
+            found.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return {
+        module
+        for module in found
+        if module.split(".")[0] == PACKAGE and "." in module and _source(module)
+    }
+
+
+def code_fingerprint(module: str) -> str:
+    """The hash of `module` and of every package module it imports, transitively.
+
+    Modules are parsed rather than imported, so hashing never loads a
+    converter or its dependencies.
+    """
+    seen = {module}
+    pending = [module]
+    while pending:
+        for name in _imports(_source(pending.pop())) - seen:
+            seen.add(name)
+            pending.append(name)
+    digest = hashlib.sha256()
+    for name in sorted(seen):
+        digest.update(name.encode())
+        digest.update(_source(name).read_bytes())
+    return digest.hexdigest()
+
+
+def fingerprint(subset: Subset, **kwargs) -> str | None:
+    """The cache key of a subset, None until its source has been downloaded."""
+    source = source_fingerprint(subset.source_path)
+    if source is None:
+        return None
+    parts = {
+        "subset": subset.name,
+        "source": source,
+        "code": code_fingerprint(subset.module),
+        "kwargs": {key: str(value) for key, value in sorted(kwargs.items())},
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def entry(name: str, key: str, root: Path = BUILD_CACHE) -> Path:
+    return root / name / key
+
+
+def restore(name: str, key: str, directory: Path, root: Path = BUILD_CACHE) -> bool:
+    """Copy the shards stored under `key` into `directory`, if there are any."""
+    path = entry(name, key, root)
+    if not (path / "manifest.json").exists():
+        return False
+    shutil.rmtree(directory / "data", ignore_errors=True)
+    # Files attached to the shards, see `sink.ParquetSink.attach`
+    for attached in directory.glob("*.json"):
+        attached.unlink()
+    shutil.copytree(path / "output", directory, dirs_exist_ok=True)
+    return True
+
+
+def store(name: str, key: str, directory: Path, root: Path = BUILD_CACHE):
+    """Save the shards written to `directory` by a converted subset under its key."""
+    path = entry(name, key, root)
+    shutil.rmtree(path, ignore_errors=True)
+    # Without the staging directories of builds that were killed
+    shutil.copytree(
+        directory, path / "output", ignore=shutil.ignore_patterns(".staging-*")
+    )
+    (path / "manifest.json").write_text(
+        json.dumps({"subset": name, "key": key, "created": time.time()})
+    )
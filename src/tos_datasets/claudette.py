@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+
+from tos_datasets.archive import ArchivePath
+from tos_datasets.proto import Classification, Document, DocumentClassification
+
+# The CLAUDETTE corpora (142 ToS, 10 ToS/PP, Multilingual Unfair Clause) store
+# one sentence per line next to a tags file with one line of space-separated
+# `<category><score>` tags per sentence, e.g. `ltd2 ter3`.
+#
+# The existing annotations identify nine different categories for clause
+# unfairness establishing: (1) jurisdiction for disputes in a country different
+# than consumer’s residence (<j>); (2) choice of a foreign law governing the
+# contract (<law>); (3) limitation of liability (<ltd>); (4) the provider’s right
+# to unilaterally terminate the contract/access to the service (<ter>); and (5)
+# the provider’s right to unilaterally modify the contract/the service (<ch>);
+# (6) requiring a consumer to undertake arbitration before the court proceedings
+# can commence (<a>); (7) the provider retaining the right to unilaterally remove
+# consumer content from the service, including in-app purchases (<cr>); (8)
+# having a consumer accept the agreement simply by using the service, not only
+# without reading it, but even without having to click on “I agree/I accept”
+# (<use>); (9) the scope of consent granted to the ToS also takes in the privacy
+# policy, which forms part of the “General Agreement” (<pinc>). In the
+# annotations, to indicate the degree of unfairness, a numeric value was
+# appended to each XML tag, with a value 1 meaning clearly fair, 2 potentially
+# unfair, and 3 clearly unfair. The privacy policies of 10 ToS/PP add the GDPR
+# categories from `ad` to `tu`.
+CATEGORIES = {
+    "j": "jurisdiction for disputes in a country different than consumer’s residence",
+    "law": "choice of a foreign law governing the contract",
+    "ltd": "limitation of liability",
+    "ter": "the provider’s right to unilaterally terminate the contract/access to the service",
+    "ch": "the provider’s right to unilaterally modify the contract/the service",
+    "a": "requiring a consumer to undertake arbitration before the court proceedings can commence",
+    "cr": "the provider retaining the right to unilaterally remove consumer content from the service, including in-app purchases",
+    "use": "having a consumer accept the agreement simply by using the service, not only without reading it, but even without having to click on “I agree/I accept”",
+    "pinc": "the scope of consent granted to the ToS also takes in the privacy policy, which forms part of the “General Agreement”",
+    "ad": "data used for advertising",
+    "basis": "data collected not form data subject",
+    "cat": "data transferred to authorities",
+    "source": "data transferred to other users",
+    "ta": "data transferred to processors",
+    "tc": "data transferred to controllers",
+    "tpr": "categories of data being collected",
+    "tu": "basis for processing",
+}
+SCORES = {
+    1: "clearly fair",
+    2: "potentially unfair",
+    3: "clearly unfair",
+}
+
+# Every tag, indexed by its id, with its (category, score) definition
+TAGS: list[str] = [f"{name}{score}" for name in CATEGORIES for score in SCORES]
+TAG_IDS: dict[str, int] = {tag: i for i, tag in enumerate(TAGS)}
+DEFINITIONS: list[tuple[str, str]] = [
+    (CATEGORIES[name], SCORES[score]) for name in CATEGORIES for score in SCORES
+]
+# Written next to the shards of every CLAUDETTE subset, see `label_definitions`
+DEFINITIONS_FILE = "label_definitions.json"
+
+
+def parse_tags(line: str) -> list[int]:
+    """The ids of the known tags on one line of a tags file."""
+    return [TAG_IDS[tag] for tag in line.split() if tag in TAG_IDS]
+
+
+def load_tag_list(path: Path | ArchivePath) -> set[int]:
+    """The ids of the tags listed in a corpus' `list_tags.txt`."""
+    return set(parse_tags(path.read_text()))
+
+
+def read_document(
+    sentences_file: Path | ArchivePath, tags_file: Path | ArchivePath
+) -> tuple[str, list[str], list[list[int]]]:
+    """The text, sentences and per-line tag ids of one document."""
+    text = sentences_file.read_text()
+    tags = [parse_tags(line) for line in tags_file.read_text().splitlines()]
+    return text, text.splitlines(), tags
+
+
+def classifications(
+    tags: list[list[int]], allowed: set[int] | None = None
+) -> list[Classification]:
+    """Sentence-level classifications, without per-sentence definitions.
+
+    Labels are the shared strings of `TAGS`; their definitions are stored once
+    per subset, see `label_definitions`.
+    """
+    return [
+        Classification(
+            level="sentence",
+            labels=[TAGS[i] for i in ids if allowed is None or i in allowed],
+        )
+        for ids in tags
+    ]
+
+
+def convert_document(
+    sentences_file: Path, tags_file: Path, language: str, compact: bool = False
+) -> dict:
+    """The record of a document whose tags file has one line per sentence."""
+    text, sentences, tags = read_document(sentences_file, tags_file)
+    assert len(sentences) == len(tags)
+    doc = Document(
+        title=sentences_file.name,
+        language=language,
+        sentences=sentences,
+        text=text,
+    )
+    return DocumentClassification(
+        document=doc.compact() if compact else doc,
+        classifications=classifications(tags),
+    ).model_dump()
+
+
+def definitions(labels: list[str]) -> list[tuple[str, str]]:
+    """The (category, score) definitions of CLAUDETTE labels."""
+    return [DEFINITIONS[TAG_IDS[label]] for label in labels]
+
+
+def label_definitions(allowed: set[int] | None = None) -> dict[str, tuple[str, str]]:
+    """The (category, score) definition of every tag a subset annotates.
+
+    Attached to the output of the subset as `DEFINITIONS_FILE`, which is
+    pushed to the Hub along with the shards.
+    """
+    return {
+        tag: DEFINITIONS[i]
+        for i, tag in enumerate(TAGS)
+        if allowed is None or i in allowed
+    }
+
+
+def read_definitions(path: Path) -> dict[str, tuple[str, str]]:
+    """The definitions stored with a build, from its directory or file."""
+    if path.is_dir():
+        path = path / DEFINITIONS_FILE
+    return {
+        tag: tuple(definition)
+        for tag, definition in json.loads(path.read_text()).items()
+    }
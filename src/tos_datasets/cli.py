@@ -0,0 +1,103 @@
+import os
+from pathlib import Path
+
+import typer
+from rich import print
+from rich.table import Table
+
+from tos_datasets.cache import BUILD_CACHE
+from tos_datasets.download import DEFAULT_CHUNK_SIZE
+from tos_datasets.registry import SUBSETS, Subset, resolve
+
+# Commands import what they run, so `--help` and `list` start instantly
+
+app = typer.Typer(help="Build the ToS/privacy policy datasets.")
+
+
+@app.command("list")
+def list_subsets():
+    """List the available subsets."""
+    for name, subset in SUBSETS.items():
+        typer.echo(f"{name}\t{subset.module}")
+
+
+def select(subsets: str) -> list[Subset]:
+    try:
+        return resolve([name.strip() for name in subsets.split(",") if name])
+    except KeyError as e:
+        raise typer.BadParameter(str(e.args[0]), param_hint="--subsets")
+
+
+@app.command()
+def download(
+    subsets: str = typer.Option("all", help="Comma-separated subset names, or `all`."),
+    jobs: int = typer.Option(4, help="Concurrent downloads."),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    """Prefetch the source archives of the selected subsets concurrently."""
+    from tos_datasets.download import Source, download_many
+
+    sources = [
+        Source(subset.url, subset.source_path)
+        for subset in select(subsets)
+        if subset.url
+    ]
+    for path in download_many(sources, max_workers=jobs, chunk_size=chunk_size):
+        typer.echo(path)
+
+
+@app.command()
+def build(
+    subsets: str = typer.Option("all", help="Comma-separated subset names, or `all`."),
+    jobs: int = typer.Option(os.cpu_count() or 1, help="Parallel subset builds."),
+    output_dir: Path = Path("output"),
+    keep_cache: bool = True,
+    push_to_hub: bool = False,
+    use_cache: bool = typer.Option(
+        True, help="Reuse builds whose source, code and schema are unchanged."
+    ),
+    cache_root: Path = BUILD_CACHE,
+    profile: str = typer.Option(
+        None, help="Run this stage (e.g. `convert`) under cProfile in every build."
+    ),
+    compact: bool = typer.Option(
+        False, help="Store each document's text once, with offsets for its units."
+    ),
+):
+    """Convert subsets concurrently and save them under `output_dir`."""
+    from tos_datasets.build import build_all
+
+    summary = build_all(
+        [subset.name for subset in select(subsets)],
+        output_dir=output_dir,
+        jobs=jobs,
+        keep_cache=keep_cache,
+        push_to_hub=push_to_hub,
+        use_cache=use_cache,
+        cache_root=cache_root,
+        profile=profile,
+        compact=compact,
+    )
+
+    table = Table(title=f"Built in {summary.seconds:.1f}s")
+    table.add_column("subset")
+    table.add_column("seconds", justify="right")
+    table.add_column("records")
+    table.add_column("status")
+    table.add_column("cache")
+    for result in summary.results:
+        table.add_row(
+            result.subset,
+            f"{result.seconds:.1f}",
+            ", ".join(f"{split}={count}" for split, count in result.records.items()),
+            "ok" if result.ok else "[red]failed[/red]",
+            "hit" if result.cached else "miss",
+        )
+    print(table)
+
+    if summary.failures:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
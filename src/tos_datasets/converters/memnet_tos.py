@@ -5,10 +5,15 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Generator
 
-import datasets
-from git import Repo
+import numpy as np
+import pandas as pd
 
+from tos_datasets.instrument import stage
 from tos_datasets.proto import Classification, Document, DocumentClassification
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
+
+FEATURES = features(DocumentClassification)
 
 
 @contextmanager
@@ -19,7 +24,10 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
     yield repo_path
     if not keep_cache:
         repo_path.unlink()
@@ -36,67 +44,94 @@ def load_tags(repo_path: Path):
     return results
 
 
-def load_clauses(repo_path: Path, tags: dict) -> Generator[str, None, None]:
+TAGS = ["A", "CH", "CR", "J", "LAW", "LTD", "PINC", "TER", "USE"]
+
+
+def parse_targets(column: pd.Series, definitions: dict[int, str]) -> list:
+    """Resolve `[1,4]`-style target ids to definitions, once per distinct value."""
+    lookup = {
+        value: [definitions[int(id)] for id in value.strip("[]").split(",")]
+        for value in column.dropna().unique()
+    }
+    return [lookup.get(value) for value in column.tolist()]
+
+
+def load_clauses(
+    repo_path: Path, tags: dict, compact: bool = False
+) -> Generator[dict, None, None]:
     corpus_path = repo_path / "local_database" / "ToS_100" / "dataset.csv"
     df = pd.read_csv(corpus_path, index_col=0)
-    for doc_id, group in df.groupby("document_ID"):
-        sentences = group["text"].tolist()
-
+    df = df.dropna(subset=["document_ID"]).sort_values("document_ID", kind="stable")
+
+    # One row of booleans per sentence, encoded as a bitmask so that rows with
+    # the same tags share a single label list
+    matrix = df[TAGS].to_numpy() == 1
+    codes = matrix @ (1 << np.arange(len(TAGS)))
+    labels = {
+        code: [tag for i, tag in enumerate(TAGS) if code >> i & 1]
+        for code in np.unique(codes).tolist()
+    }
+    # TER_targets	LTD_targets	A_targets	CH_targets	CR_targets
+    targets = [
+        parse_targets(df[f"{tag}_targets"], tags[tag])
+        for tag in TAGS
+        if f"{tag}_targets" in df.columns
+    ]
+
+    doc_ids = df["document_ID"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, doc_ids[1:] != doc_ids[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+    sentences = df["text"].tolist()
+    titles = df["document"].tolist()
+    codes = codes.tolist()
+    for start, end in zip(starts.tolist(), ends.tolist()):
         doc = Document(
-            title=group["document"].iloc[0],
+            title=titles[start],
             language="en",
-            sentences=sentences,
+            sentences=sentences[start:end],
         )
-        clauses = []
-        for sentence, (_, annotation) in zip(sentences, group.iterrows()):
-            # A	CH	CR	J	LAW	LTD	PINC	TER	USE
-            # TER_targets	LTD_targets	A_targets	CH_targets	CR_targets
-            curr_tags = []
-            curr_tag_definitions = []
-            for tag in ["A", "CH", "CR", "J", "LAW", "LTD", "PINC", "TER", "USE"]:
-                if annotation[tag] == 1:
-                    curr_tags.append(tag)
-                if f"{tag}_targets" in annotation:
-                    ids = annotation[f"{tag}_targets"]
-                    if pd.isna(ids):
-                        continue
-                    curr_tag_definitions.append(
-                        [tags[tag][int(id)] for id in ids.strip("[]").split(",")]
-                    )
-
-            clauses.append(
-                Classification(
-                    level="sentence",
-                    labels=curr_tags,
-                    label_definitions=curr_tag_definitions,
-                )
+        clauses = [
+            Classification(
+                level="sentence",
+                labels=labels[codes[i]],
+                label_definitions=[
+                    column[i] for column in targets if column[i] is not None
+                ],
             )
+            for i in range(start, end)
+        ]
         yield DocumentClassification(
-            document=doc, classifications=clauses
-        ).model_dump_json()
+            document=doc.compact() if compact else doc, classifications=clauses
+        ).model_dump()
+
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "memnet_tos",
+    keep_cache: bool = True,
+    compact: bool = False,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
+        with stage("convert") as s:
+            tags = load_tags(repo_path)
+            s.records = sink.write_all(load_clauses(repo_path, tags, compact=compact))
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
-    from tos_datasets.proto import DocumentClassification
-
     def main(
         cache_dir: Path = Path.home() / ".cache" / "memnet_tos",
         push_to_hub: bool = False,
         keep_cache: bool = True,
+        compact: bool = False,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            tags = load_tags(repo_path)
-            records = load_clauses(repo_path, tags)
-
-        df = pd.DataFrame(records)
-        dataset = datasets.Dataset.from_pandas(df)
-        dataset = dataset.rename_column("0", "document")
+        dataset = to_dataset(
+            write, FEATURES, cache_dir=cache_dir, keep_cache=keep_cache, compact=compact
+        )
 
-        print(DocumentClassification.model_validate_json(dataset["document"][0]))
+        print(DocumentClassification.model_validate(dataset["train"][0]))
 
         if push_to_hub:
             dataset.push_to_hub("chenghao/tos_pp_dataset", "memnet_tos")
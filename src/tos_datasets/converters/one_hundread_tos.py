@@ -1,75 +1,98 @@
-import zipfile
-from contextlib import contextmanager
+import hashlib
+import io
 from pathlib import Path
 from typing import Generator
 
-import fitz
 import pandas as pd
-import requests
 from loguru import logger
 
+from tos_datasets.archive import ArchivePath
+from tos_datasets.download import download_archive
+from tos_datasets.instrument import stage
+from tos_datasets.parallel import imap
 from tos_datasets.proto import (
     Document,
     DocumentEUConsumerLawAnnotation,
     EUConsumerLawAnnotation,
     Service,
 )
-
-
-@contextmanager
-def download_and_unzip(
-    url: str = "https://prod-dcd-datasets-cache-zipfiles.s3.eu-west-1.amazonaws.com/dtbj87j937-3.zip",
-    cache_dir: Path = Path.home() / ".cache" / "100_tos",
-    keep_cache: bool = True,
-):
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    zip_path = cache_dir / "100_tos.zip"
-
-    if not zip_path.exists():
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        with open(zip_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-    extract_dir = cache_dir / "Annotated Terms of Service of 100 Online Platforms"
-    if not extract_dir.exists():
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            zip_ref.extractall(cache_dir)
-
-    yield extract_dir
-
-    if not keep_cache:
-        cache_dir.unlink()
-
-
-def load_annotations(local_dir: Path) -> pd.DataFrame:
-    annotations = pd.read_csv(
-        local_dir / "Terms of Service Analysis and Evaluation_RESULTS.csv", sep=";"
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
+
+URL = "https://prod-dcd-datasets-cache-zipfiles.s3.eu-west-1.amazonaws.com/dtbj87j937-3.zip"
+FEATURES = features(DocumentEUConsumerLawAnnotation)
+
+
+def extract_text(path: Path) -> str:
+    import fitz
+
+    with fitz.open(path) as doc:
+        return "\n".join(page.get_text() for page in doc)
+
+
+def extract_texts(
+    files: list[ArchivePath], text_cache: Path, jobs: int | None = None
+) -> list[str]:
+    """Extract PDF texts in a process pool, caching them by content hash."""
+    text_cache.mkdir(parents=True, exist_ok=True)
+    cached = [
+        text_cache / f"{hashlib.sha256(file.read_bytes()).hexdigest()}.txt"
+        for file in files
+    ]
+    texts = {i: path.read_text() for i, path in enumerate(cached) if path.exists()}
+    missing = [i for i in range(len(files)) if i not in texts]
+    if missing:
+        logger.info(f"Extracting {len(missing)} of {len(files)} PDFs")
+        with stage("extract") as s:
+            paths = [files[i].extract() for i in missing]
+            extracted = imap(extract_text, paths, jobs=jobs, chunksize=1)
+            for i, text in zip(missing, extracted):
+                partial = cached[i].with_suffix(".part")
+                partial.write_text(text)
+                partial.replace(cached[i])
+                texts[i] = text
+            s.records = len(missing)
+    return [texts[i] for i in range(len(files))]
+
+
+def load_annotations(
+    local_dir: ArchivePath, text_cache: Path, jobs: int | None = None
+) -> pd.DataFrame:
+    with (local_dir / "Terms of Service Analysis and Evaluation_RESULTS.csv").open(
+        "rb"
+    ) as f:
+        annotations = pd.read_csv(f, sep=";")
+    companies = set(annotations.name.str.lower())
+    files = [
+        file
+        for file in (local_dir / "Clear ToS").glob("*.pdf")
+        if file.stem.lower() in companies
+    ]
+    texts = pd.DataFrame(
+        {
+            "_company": [file.stem.lower() for file in files],
+            "full_text": extract_texts(files, text_cache, jobs),
+        }
+    ).drop_duplicates("_company", keep="last")
+    annotations = annotations.assign(_company=annotations.name.str.lower()).merge(
+        texts, on="_company", how="left"
+    )
+    return annotations.assign(full_text=annotations.full_text.fillna("")).drop(
+        columns="_company"
     )
-    annotations = annotations.assign(full_text=["" for _ in range(len(annotations))])
-    companies = sorted(annotations.name.str.lower().unique())
-    for file in (local_dir / "Clear ToS").glob("*.pdf"):
-        company = file.name.replace(".pdf", "")
-        if company.lower() not in companies:
-            continue
-        doc = fitz.open(file)
-        text = "\n".join(page.get_text() for page in doc)
-        annotations.loc[
-            annotations.name.str.lower() == company.lower(), "full_text"
-        ] = text
-    return annotations
 
 
-def load_definitions(local_dir: Path) -> pd.DataFrame:
-    definitions = pd.read_excel(local_dir / "Variables Definitions.xlsx")
+def load_definitions(local_dir: ArchivePath) -> pd.DataFrame:
+    definitions = pd.read_excel(
+        io.BytesIO((local_dir / "Variables Definitions.xlsx").read_bytes())
+    )
     return definitions
 
 
 def convert(
     annotations: pd.DataFrame,
     definitions: pd.DataFrame,
-) -> Generator[DocumentEUConsumerLawAnnotation, None, None]:
+) -> Generator[dict, None, None]:
     definitions = definitions.ffill()
     labels = {}
     for start in range(0, len(definitions), 3):
@@ -112,35 +135,46 @@ def convert(
                     for key, value in record.items()
                     if (key, value) in labels
                 ],
-            ).model_dump_json()
+            ).model_dump()
         except Exception as e:
             logger.error(f"Error processing record: {e}")
             continue
 
 
+def write(
+    sink: ParquetSink,
+    keep_cache: bool = True,
+    cache_dir: Path = Path.home() / ".cache" / "100_tos",
+    jobs: int | None = None,
+):
+    with download_archive(
+        URL,
+        cache_dir / "100_tos.zip",
+        "Annotated Terms of Service of 100 Online Platforms",
+        keep_cache=keep_cache,
+    ) as local_dir:
+        annotations = load_annotations(local_dir, cache_dir / "text", jobs)
+        definitions = load_definitions(local_dir)
+
+    with stage("convert") as s:
+        s.records = sink.write_all(convert(annotations, definitions))
+
+
 if __name__ == "__main__":
-    import datasets
     import typer
     from rich import print
 
-    from tos_datasets.proto import DocumentEUConsumerLawAnnotation
-
     def main(
         push_to_hub: bool = False,
         keep_cache: bool = True,
         cache_dir: Path = Path.home() / ".cache" / "100_tos",
+        jobs: int | None = None,
     ):
-        with download_and_unzip(
-            cache_dir=cache_dir, keep_cache=keep_cache
-        ) as local_dir:
-            annotations = load_annotations(local_dir)
-            definitions = load_definitions(local_dir)
-
-        df = pd.DataFrame(list(convert(annotations, definitions)))
-        ds = datasets.Dataset.from_pandas(df)
-        ds = ds.rename_column("0", "document")
+        ds = to_dataset(
+            write, FEATURES, keep_cache=keep_cache, cache_dir=cache_dir, jobs=jobs
+        )
 
-        print(DocumentEUConsumerLawAnnotation.model_validate_json(ds["document"][0]))
+        print(DocumentEUConsumerLawAnnotation.model_validate(ds["train"][0]))
 
         if push_to_hub:
             ds.push_to_hub("chenghao/tos_pp_dataset", "100_tos")
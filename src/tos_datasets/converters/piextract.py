@@ -1,18 +1,26 @@
 from collections import defaultdict
 from contextlib import contextmanager
+from functools import cache, partial
+from itertools import chain
 from pathlib import Path
+from typing import Generator
 
-import datasets
-from git import Repo
-from nltk.tokenize.treebank import TreebankWordDetokenizer
+from tos_datasets.alignment import align
+from tos_datasets.instrument import stage
+from tos_datasets.parallel import istarmap
+from tos_datasets.proto import Document, DocumentSequenceClassification, Tag
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
 
-from tos_datasets.proto import (
-    Document,
-    DocumentSequenceClassification,
-    Tag,
-)
+FEATURES = features(DocumentSequenceClassification)
 
-detokenizer = TreebankWordDetokenizer()
+
+@cache
+def detokenizer():
+    """The NLTK detokenizer, loaded on the first sentence of each process."""
+    from nltk.tokenize.treebank import TreebankWordDetokenizer
+
+    return TreebankWordDetokenizer()
 
 
 @contextmanager
@@ -23,58 +31,90 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
     yield repo_path / "dataset"
     if not keep_cache:
         repo_path.unlink()
 
 
-def load_data(repo_path: Path) -> dict[str, list[str]]:
-    results: dict[str, list[str]] = defaultdict(list)
-    # unzip data/sanitized_split.zip
-
-    for f in repo_path.glob("**/*.conll03"):
-        split = f.stem
-        with open(f, "r") as file:
-            for sentence in file.read().split("\n\n"):
-                tokens = []
-                labels = []
-                for line in sentence.split("\n"):
-                    if line.count(" ") != 3:
-                        continue
-                    token, _, _, tag = line.split(" ")
-                    if token == "-DOCSTART-":
-                        continue
-                    tokens.append(token)
-                    labels.append(tag)
-
-                if not tokens:
-                    continue
-                text = detokenizer.detokenize(tokens)
-                start = 0
-                tags = []
-                for token, label in zip(tokens, labels):
-                    while text[start : start + len(token)] != token:
-                        start += 1
-                    tags.append(
-                        Tag(
-                            tag=label,
-                            start=start,
-                            end=start + len(token),
-                        )
-                    )
-                results[split].append(
-                    DocumentSequenceClassification(
-                        document=Document(title="na", text=text, tokens=tokens),
-                        tags=tags,
-                    ).model_dump_json()
-                )
-                # results[split].append(sentence.text)
-    return results
+def read_conll(path: Path) -> Generator[tuple[list[str], list[str]], None, None]:
+    """Lazily yield the tokens and NER tags of each sentence of a CoNLL-2003 file."""
+    tokens: list[str] = []
+    labels: list[str] = []
+    with open(path, "r") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if not line:
+                if tokens:
+                    yield tokens, labels
+                tokens, labels = [], []
+                continue
+            if line.count(" ") != 3:
+                continue
+            token, _, _, tag = line.split(" ")
+            if token == "-DOCSTART-":
+                continue
+            tokens.append(token)
+            labels.append(tag)
+    if tokens:
+        yield tokens, labels
+
+
+def load_splits(repo_path: Path) -> dict[str, list[Path]]:
+    splits: dict[str, list[Path]] = defaultdict(list)
+    for f in sorted(repo_path.glob("**/*.conll03")):
+        splits[f.stem].append(f)
+    return splits
+
+
+def convert_sentence(
+    tokens: list[str], labels: list[str], compact: bool = False
+) -> dict:
+    text = detokenizer().detokenize(tokens)
+    spans = align(tokens, text)
+    tags = [
+        Tag(tag=label, start=start, end=end)
+        for label, (start, end) in zip(labels, spans)
+    ]
+    # `compact` keeps these offsets, as the detokenizer rewrites Treebank quotes
+    doc = Document(
+        title="na", text=text, tokens=tokens, token_spans=spans if compact else None
+    )
+    return DocumentSequenceClassification(
+        document=doc.compact() if compact else doc,
+        tags=tags,
+    ).model_dump()
+
+
+def convert(
+    files: list[Path], compact: bool = False, jobs: int | None = None
+) -> Generator[dict, None, None]:
+    """Convert sentences in a process pool as they are read, in file order."""
+    sentences = chain.from_iterable(map(read_conll, files))
+    parse = partial(convert_sentence, compact=compact)
+    yield from istarmap(parse, sentences, jobs=jobs, chunksize=256)
+
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "Piextract",
+    keep_cache: bool = True,
+    compact: bool = False,
+    jobs: int | None = None,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
+        # Each split is written to Parquet shards as its sentences are read
+        with stage("convert") as s:
+            s.records = sum(
+                sink.write_all(convert(files, compact=compact, jobs=jobs), split)
+                for split, files in load_splits(repo_path).items()
+            )
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
@@ -82,27 +122,19 @@ if __name__ == "__main__":
         cache_dir: Path = Path.home() / ".cache" / "Piextract",
         push_to_hub: bool = False,
         keep_cache: bool = True,
+        compact: bool = False,
+        jobs: int | None = None,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            # print(repo_path)
-            data = load_data(repo_path)
-            print(data["validation"][0])
-
-        dataset = datasets.DatasetDict(
-            {
-                split: datasets.Dataset.from_pandas(
-                    pd.DataFrame(data[split], columns=["document"])
-                )
-                for split in data
-            }
+        dataset = to_dataset(
+            write,
+            FEATURES,
+            cache_dir=cache_dir,
+            keep_cache=keep_cache,
+            compact=compact,
+            jobs=jobs,
         )
 
-        print(
-            DocumentSequenceClassification.model_validate_json(
-                dataset["train"]["document"][0]
-            )
-        )
-        # print(DocumentEvent.model_validate_json(dataset["train"]["type_ii"][0]))
+        print(DocumentSequenceClassification.model_validate(dataset["train"][0]))
 
         if push_to_hub:
             dataset.push_to_hub("chenghao/tos_pp_dataset", "privacy_glue/piextract")
@@ -1,13 +1,17 @@
 import json
-import zipfile
+import shutil
 from collections import defaultdict
 from contextlib import contextmanager
-from itertools import groupby
+from functools import partial
+from itertools import accumulate
 from pathlib import Path
+from typing import Generator
 
 import datasets
-from git import Repo
 
+from tos_datasets.archive import Archive, ArchivePath, open_archive
+from tos_datasets.instrument import stage
+from tos_datasets.parallel import imap
 from tos_datasets.proto import (
     Document,
     DocumentEvent,
@@ -15,6 +19,15 @@ from tos_datasets.proto import (
     Event,
     Tag,
 )
+from tos_datasets.schema import feature
+from tos_datasets.sink import ParquetSink, to_dataset
+
+FEATURES = datasets.Features(
+    {
+        "type_i": feature(DocumentSequenceClassification),
+        "type_ii": feature(DocumentEvent),
+    }
+)
 
 
 @contextmanager
@@ -25,91 +38,117 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
-    # unzip data/sanitized_split.zip
-    with zipfile.ZipFile(repo_path / "data/sanitized_split.zip", "r") as zip_ref:
-        zip_ref.extractall(repo_path / "data")
-    yield repo_path / "data" / "sanitized_split"
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
+    with Archive(repo_path / "data" / "sanitized_split.zip") as archive:
+        yield archive / "sanitized_split"
     if not keep_cache:
-        repo_path.unlink()
-
-
-def load_data(repo_path: Path) -> dict[str, list[str]]:
-    results: dict[str, list[tuple[str, str]]] = defaultdict(list)
-    # unzip data/sanitized_split.zip
-
-    for p, files in groupby(repo_path.glob("**/*.json"), key=lambda x: x.parent):
-        split = "train" if "train" in str(p) else "test"
-        paragraphs = []
-        spans = []
-        events = []
-        global_start = 0
-        for f in sorted(files, key=lambda x: int(x.stem)):
-            with open(f) as inp:
-                data = json.load(inp)
-                text: str = data["text"]
-                paragraphs.append(text)
-                for entity in data["entity/argument_mentions"]:
-                    label: str = entity["entity/argument_type"]
-                    start: int = entity["start_idx"]
-                    end: int = entity["end_idx"]
-                    assert text[start:end] == entity["entity/argument_text"]
-                    spans.append(
-                        Tag(
-                            tag=label,
-                            start=global_start + start,
-                            end=global_start + end,
-                            comment="entity/argument_mentions",
-                        )
-                    )
-
-                for event in data["event_mentions"]:
-                    event_type = event["event_type"]
-                    trigger = Tag(
-                        tag=f"""{event_type} - trigger""",
-                        start=global_start + event["trigger"]["start_idx"],
-                        end=global_start + event["trigger"]["end_idx"],
-                    )
-                    arguments = []
-                    for arg in event["arguments"]:
-                        arguments.append(
-                            Tag(
-                                tag=arg["type"],
-                                start=global_start + arg["start_idx"],
-                                end=global_start + arg["end_idx"],
-                                comment=f"""role: {arg["role"]}""",
-                            )
-                        )
-                    events.append(
-                        Event(
-                            event_type=event_type, trigger=trigger, arguments=arguments
-                        )
-                    )
-
-                global_start += len(text)
-
-        results[split].append(
-            (
-                DocumentSequenceClassification(
-                    document=Document(
-                        title=p.name, paragraphs=paragraphs, language="en"
-                    ),
-                    tags=spans,
-                ).model_dump_json(),
-                DocumentEvent(
-                    document=Document(
-                        title=p.name, paragraphs=paragraphs, language="en"
-                    ),
-                    events=events,
-                ).model_dump_json(),
-            )
+        shutil.rmtree(repo_path)
+
+
+def load_manifest(root: ArchivePath) -> list[tuple[str, str, list[str]]]:
+    """The split, title and paragraph files of every policy, in path order.
+
+    Paragraph files are grouped by their directory and ordered by their index,
+    so a policy is never split however the archive orders its members.
+    """
+    policies: dict[ArchivePath, list[ArchivePath]] = defaultdict(list)
+    for f in root.glob("**/*.json"):
+        policies[f.parent].append(f)
+    return [
+        (
+            "train" if "train" in p.at else "test",
+            p.name,
+            [f.at for f in sorted(files, key=lambda x: int(x.stem))],
         )
+        for p, files in sorted(policies.items(), key=lambda item: item[0].at)
+    ]
+
+
+def load_policy(
+    zip_path: Path, title: str, members: list[str], compact: bool = False
+) -> dict:
+    archive = open_archive(zip_path)
+    data = [json.loads((archive / member).read_bytes()) for member in members]
+    paragraphs: list[str] = [paragraph["text"] for paragraph in data]
+    # Offset of every paragraph in the joined policy text
+    offsets = list(accumulate(map(len, paragraphs), initial=0))
+    spans = []
+    events = []
+    for global_start, paragraph, text in zip(offsets, data, paragraphs):
+        for entity in paragraph["entity/argument_mentions"]:
+            label: str = entity["entity/argument_type"]
+            start: int = entity["start_idx"]
+            end: int = entity["end_idx"]
+            assert text[start:end] == entity["entity/argument_text"]
+            spans.append(
+                Tag(
+                    tag=label,
+                    start=global_start + start,
+                    end=global_start + end,
+                    comment="entity/argument_mentions",
+                )
+            )
+
+        for event in paragraph["event_mentions"]:
+            event_type = event["event_type"]
+            trigger = Tag(
+                tag=f"""{event_type} - trigger""",
+                start=global_start + event["trigger"]["start_idx"],
+                end=global_start + event["trigger"]["end_idx"],
+            )
+            arguments = [
+                Tag(
+                    tag=arg["type"],
+                    start=global_start + arg["start_idx"],
+                    end=global_start + arg["end_idx"],
+                    comment=f"""role: {arg["role"]}""",
+                )
+                for arg in event["arguments"]
+            ]
+            events.append(
+                Event(event_type=event_type, trigger=trigger, arguments=arguments)
+            )
 
-    return results
+    doc = Document(title=title, paragraphs=paragraphs, language="en")
+    if compact:
+        doc = doc.compact()
+    return {
+        "type_i": DocumentSequenceClassification(document=doc, tags=spans).model_dump(),
+        "type_ii": DocumentEvent(document=doc, events=events).model_dump(),
+    }
+
+
+def load_data(
+    root: ArchivePath, compact: bool = False, jobs: int | None = None
+) -> Generator[tuple[str, dict], None, None]:
+    """Parse every policy in a process pool, keeping the manifest order."""
+    manifest = load_manifest(root)
+    parse = partial(load_policy, root.archive.path, compact=compact)
+    titles = [title for _, title, _ in manifest]
+    members = [files for _, _, files in manifest]
+    records = imap(parse, titles, members, jobs=jobs, chunksize=4)
+    for (split, _, _), record in zip(manifest, records):
+        yield split, record
+
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "PolicyIE",
+    keep_cache: bool = True,
+    compact: bool = False,
+    jobs: int | None = None,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
+        with stage("convert") as s:
+            for split, record in load_data(repo_path, compact=compact, jobs=jobs):
+                sink.write(record, split)
+            s.records = sum(sink.records.values())
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
@@ -117,26 +156,22 @@ if __name__ == "__main__":
         cache_dir: Path = Path.home() / ".cache" / "PolicyIE",
         push_to_hub: bool = False,
         keep_cache: bool = True,
+        compact: bool = False,
+        jobs: int | None = None,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            # print(repo_path)
-            data = load_data(repo_path)
-
-        dataset = datasets.DatasetDict(
-            {
-                split: datasets.Dataset.from_pandas(
-                    pd.DataFrame(data[split], columns=["type_i", "type_ii"])
-                )
-                for split in data
-            }
+        dataset = to_dataset(
+            write,
+            FEATURES,
+            cache_dir=cache_dir,
+            keep_cache=keep_cache,
+            compact=compact,
+            jobs=jobs,
         )
 
         print(
-            DocumentSequenceClassification.model_validate_json(
-                dataset["train"]["type_i"][0]
-            )
+            DocumentSequenceClassification.model_validate(dataset["train"][0]["type_i"])
         )
-        print(DocumentEvent.model_validate_json(dataset["train"]["type_ii"][0]))
+        print(DocumentEvent.model_validate(dataset["train"][0]["type_ii"]))
 
         if push_to_hub:
             dataset.push_to_hub("chenghao/tos_pp_dataset", "privacy_glue/policy_ie")
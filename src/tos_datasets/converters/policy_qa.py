@@ -1,15 +1,16 @@
-import json
 from contextlib import contextmanager
+from itertools import accumulate
 from pathlib import Path
+from typing import Generator
 
-import datasets
-from git import Repo
+from tos_datasets.instrument import stage
+from tos_datasets.jsonstream import iter_array
+from tos_datasets.proto import QA, Document, DocumentQA
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
 
-from tos_datasets.proto import (
-    QA,
-    Document,
-    DocumentQA,
-)
+SPLITS = ("train", "dev", "test")
+FEATURES = features(DocumentQA)
 
 
 @contextmanager
@@ -20,59 +21,74 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
     yield repo_path
     if not keep_cache:
         repo_path.unlink()
 
 
-def load_data(repo_path: Path) -> dict[str, list[str]]:
-    results: dict[str, list[str]] = {}
-    for file in repo_path.glob("data/*.json"):
-        split = file.stem
-        results[split] = []
-        with open(file, "r") as f:
-            data = json.load(f)
-
-            for record in data["data"]:
-                title = record["title"]
-                paragraph_text = []
-                doc_text = ""
-                annotations = []
-                paragraphs = record["paragraphs"]
-                for paragraph in paragraphs:
-                    context = paragraph["context"]
-                    context += "\n"
-                    qas = paragraph["qas"]
-                    for qa in qas:
-                        question = qa["question"]
-                        answer = qa["answers"][0]["text"]
-                        answer_start = qa["answers"][0]["answer_start"]
-                        global_start = len(doc_text) + answer_start
-                        global_end = global_start + len(answer)
-
-                        annotations.append(
-                            QA(
-                                question=question,
-                                answer=answer,
-                                start=global_start,
-                                end=global_end,
-                                is_impossible=False,
-                            )
-                        )
-
-                    doc_text += context
-                    paragraph_text.append(context)
-
-                doc = Document(title=title, text=doc_text, paragraphs=paragraph_text)
-                doc_qa = DocumentQA(document=doc, qas=annotations)
-                results[split].append(doc_qa.model_dump_json())
-
-    return results
+def load_records(file: Path) -> Generator[dict, None, None]:
+    """The policies of a SQuAD-style split file, parsed one at a time."""
+    with open(file, "r") as f:
+        yield from iter_array(f, "data")
+
+
+def convert_record(record: dict, compact: bool = False) -> dict:
+    paragraphs = [paragraph["context"] + "\n" for paragraph in record["paragraphs"]]
+    # Offset of every paragraph in the joined policy text
+    offsets = accumulate(map(len, paragraphs), initial=0)
+    annotations = []
+    for offset, paragraph in zip(offsets, record["paragraphs"]):
+        for qa in paragraph["qas"]:
+            answer = qa["answers"][0]
+            start = offset + answer["answer_start"]
+            annotations.append(
+                QA(
+                    question=qa["question"],
+                    answer=answer["text"],
+                    start=start,
+                    end=start + len(answer["text"]),
+                    is_impossible=False,
+                )
+            )
+
+    doc = Document(
+        title=record["title"], text="".join(paragraphs), paragraphs=paragraphs
+    )
+    if compact:
+        doc = doc.compact()
+    return DocumentQA(document=doc, qas=annotations).model_dump()
+
+
+def convert(file: Path, compact: bool = False) -> Generator[dict, None, None]:
+    for record in load_records(file):
+        yield convert_record(record, compact=compact)
+
+
+def load_splits(repo_path: Path) -> dict[str, Path]:
+    # Named explicitly, as other files can end up next to the splits in `data/`
+    return {split: repo_path / "data" / f"{split}.json" for split in SPLITS}
+
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "PolicyQA",
+    keep_cache: bool = True,
+    compact: bool = False,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
+        # Each split is written to Parquet shards as its policies are parsed
+        with stage("convert") as s:
+            s.records = sum(
+                sink.write_all(convert(file, compact=compact), split)
+                for split, file in load_splits(repo_path).items()
+            )
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
@@ -80,20 +96,13 @@ if __name__ == "__main__":
         cache_dir: Path = Path.home() / ".cache" / "PolicyQA",
         push_to_hub: bool = False,
         keep_cache: bool = True,
+        compact: bool = False,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            data = load_data(repo_path)
-
-        dataset = datasets.DatasetDict(
-            {
-                split: datasets.Dataset.from_pandas(
-                    pd.DataFrame(data[split], columns=["document"])
-                )
-                for split in data
-            }
+        dataset = to_dataset(
+            write, FEATURES, cache_dir=cache_dir, keep_cache=keep_cache, compact=compact
         )
 
-        print(DocumentQA.model_validate_json(dataset["train"]["document"][0]))
+        print(DocumentQA.model_validate(dataset["train"][0]))
 
         if push_to_hub:
             dataset.push_to_hub("chenghao/tos_pp_dataset", "privacy_glue/policy_qa")
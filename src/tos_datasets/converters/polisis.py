@@ -1,15 +1,13 @@
-from collections import defaultdict
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Generator
 
-import datasets
-from git import Repo
+import pandas as pd
 
-from tos_datasets.proto import (
-    Classification,
-    Document,
-    DocumentClassification,
-)
+from tos_datasets.instrument import stage
+from tos_datasets.proto import DocumentClassification, dump_many, validate_many
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
 
 
 @contextmanager
@@ -20,41 +18,64 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
     yield repo_path / "datasets"
     if not keep_cache:
         repo_path.unlink()
 
 
-def load_data(dir: Path) -> dict[str, list[str]]:
-    folders = ["Majority", "Union"]
-    results: dict[str, list[str]] = defaultdict(list)
+FOLDERS = ["Majority", "Union"]
+SPLITS = ["train", "validation", "test"]
+FEATURES = features(DocumentClassification)
 
-    for folder in folders:
-        for file in ["train_dataset.csv", "validation_dataset.csv", "test_dataset.csv"]:
-            split = file.split("_")[0]
-            sentence2labels = defaultdict(set)
-            df = pd.read_csv(dir / folder / file, names=["sentence", "label"])
-            for _, row in df.iterrows():
-                sentence2labels[row["sentence"]].add(row["label"])
 
-            for sentence, labels in sentence2labels.items():
-                results[split].append(
-                    DocumentClassification(
-                        document=Document(title="na", text=sentence),
-                        classifications=[
-                            Classification(
-                                level=f"document-{folder}", labels=list(labels)
-                            ),
-                        ],
-                    ).model_dump_json()
-                )
+def load_split(dir: Path, split: str) -> Generator[dict, None, None]:
+    """One record per sentence, with its Majority and Union label sets."""
+    df = pd.concat(
+        [
+            pd.read_csv(
+                dir / folder / f"{split}_dataset.csv", names=["sentence", "label"]
+            ).assign(folder=folder)
+            for folder in FOLDERS
+        ],
+        ignore_index=True,
+    ).drop_duplicates()
+    labels = {
+        folder: group.groupby("sentence", sort=False)["label"].agg(list).to_dict()
+        for folder, group in df.groupby("folder", sort=False)
+    }
+    rows = [
+        {
+            "document": {"title": "na", "text": sentence},
+            "classifications": [
+                {
+                    "level": f"document-{folder}",
+                    "labels": labels.get(folder, {}).get(sentence, []),
+                }
+                for folder in FOLDERS
+            ],
+        }
+        for sentence in df["sentence"].drop_duplicates()
+    ]
+    yield from dump_many(validate_many(DocumentClassification, rows))
 
-    return results
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "Polisis",
+    keep_cache: bool = True,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
+        with stage("convert") as s:
+            s.records = sum(
+                sink.write_all(load_split(repo_path, split), split) for split in SPLITS
+            )
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
@@ -63,21 +84,12 @@ if __name__ == "__main__":
         push_to_hub: bool = False,
         keep_cache: bool = True,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            data = load_data(repo_path)
-
-        dataset = datasets.DatasetDict(
-            {
-                split: datasets.Dataset.from_pandas(
-                    pd.DataFrame(data[split], columns=["document"])
-                )
-                for split in data
-            }
-        )
-        print(
-            DocumentClassification.model_validate_json(dataset["test"]["document"][0])
+        dataset = to_dataset(
+            write, FEATURES, cache_dir=cache_dir, keep_cache=keep_cache
         )
 
+        print(DocumentClassification.model_validate(dataset["test"][0]))
+
         if push_to_hub:
             dataset.push_to_hub("chenghao/tos_pp_dataset", "privacy_glue/polisis")
 
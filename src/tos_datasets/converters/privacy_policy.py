@@ -2,14 +2,19 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Generator
 
-import datasets
-from git import Repo
+import pandas as pd
 
+from tos_datasets.instrument import stage
+from tos_datasets.parallel import istarmap
 from tos_datasets.proto import (
     Classification,
     Document,
     DocumentClassification,
 )
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
+
+FEATURES = features(DocumentClassification)
 
 
 @contextmanager
@@ -20,28 +25,68 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
     yield repo_path / "data" / "1301_dataset.csv.xz"
     if not keep_cache:
         repo_path.unlink()
 
 
-def load_data(file_path: Path) -> Generator[str, None, None]:
-    df = pd.read_csv(file_path, index_col=0)
-    for _, row in df.iterrows():
-        yield DocumentClassification(
-            document=Document(title=row["link_text"], text=row["policy_text"]),
-            classifications=[
-                Classification(
-                    level="document",
-                    labels=["is_policy" if row["is_policy"] else "not_policy"],
-                )
-            ],
-        ).model_dump_json()
+def read_policies(
+    file_path: Path, chunksize: int = 256
+) -> Generator[tuple[str, str, bool], None, None]:
+    """Stream the title, text and label of each policy, `chunksize` at a time.
+
+    pandas decompresses the xz archive incrementally, so this reader holds a
+    single chunk of `policy_text` at once. Its consumer decides the overall
+    bound, see `load_data`.
+    """
+    with pd.read_csv(file_path, index_col=0, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield from zip(chunk["link_text"], chunk["policy_text"], chunk["is_policy"])
+
+
+def convert_policy(title: str, text: str, is_policy: bool) -> dict:
+    return DocumentClassification(
+        document=Document(title=title, text=text),
+        classifications=[
+            Classification(
+                level="document",
+                labels=["is_policy" if is_policy else "not_policy"],
+            )
+        ],
+    ).model_dump()
+
+
+def load_data(
+    file_path: Path, chunksize: int = 256, jobs: int | None = None
+) -> Generator[dict, None, None]:
+    """Convert policies in a process pool as they are read, in file order.
+
+    `istarmap` keeps up to two chunks in flight per worker, and their
+    converted records until they are written, so memory is bounded by
+    O(jobs × chunksize) policies rather than by the size of the corpus.
+    """
+    policies = read_policies(file_path, chunksize)
+    yield from istarmap(convert_policy, policies, jobs=jobs, chunksize=chunksize)
+
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "PrivacyPolicy",
+    keep_cache: bool = True,
+    chunksize: int = 256,
+    jobs: int | None = None,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as file_path:
+        # Records are flushed to Parquet shards in batches as they are produced
+        with stage("convert") as s:
+            s.records = sink.write_all(load_data(file_path, chunksize, jobs))
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
@@ -49,13 +94,19 @@ if __name__ == "__main__":
         cache_dir: Path = Path.home() / ".cache" / "PrivacyPolicy",
         push_to_hub: bool = False,
         keep_cache: bool = True,
+        chunksize: int = 256,
+        jobs: int | None = None,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            data = load_data(repo_path)
-
-        ds = datasets.Dataset.from_pandas(pd.DataFrame(data, columns=["document"]))
+        ds = to_dataset(
+            write,
+            FEATURES,
+            cache_dir=cache_dir,
+            keep_cache=keep_cache,
+            chunksize=chunksize,
+            jobs=jobs,
+        )
 
-        print(DocumentClassification.model_validate_json(ds["document"][0]))
+        print(DocumentClassification.model_validate(ds["train"][0]))
 
         if push_to_hub:
             ds.push_to_hub("chenghao/tos_pp_dataset", "privacy_glue/policy_detection")
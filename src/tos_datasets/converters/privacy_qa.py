@@ -1,15 +1,20 @@
-from collections import defaultdict
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Generator
 
-import datasets
-from git import Repo
+import numpy as np
+import pandas as pd
 
+from tos_datasets.instrument import stage
 from tos_datasets.proto import (
     Classification,
     Document,
     DocumentClassification,
 )
+from tos_datasets.schema import features
+from tos_datasets.sink import ParquetSink, to_dataset
+
+FEATURES = features(DocumentClassification)
 
 
 @contextmanager
@@ -20,45 +25,79 @@ def download(
 ):
     repo_path = cache_dir
     if not repo_path.exists():
-        Repo.clone_from(repo, repo_path)
+        from git import Repo
+
+        with stage("clone"):
+            Repo.clone_from(repo, repo_path)
     yield repo_path / "data"
     if not keep_cache:
         repo_path.unlink()
 
 
-def load_data(dir: Path) -> dict[str, list[str]]:
-    results: dict[str, list[str]] = defaultdict(list)
-
+def load_data(
+    dir: Path, compact: bool = False
+) -> Generator[tuple[str, dict], None, None]:
+    """The split and record of every document, one document at a time."""
     for file in ["policy_train_data.csv", "policy_test_data.csv"]:
         split = file.split("_")[1]
         df = pd.read_csv(dir / file, sep="\t")
         label_col = "Any_Relevant" if split == "test" else "Label"
-        for doc_id, group in df.groupby("DocID"):
-            classifications = []
-            segments = []
-            for query, rows in group.groupby("QueryID"):
-                classifications.append(
-                    Classification(
-                        level="sentence",
-                        labels=list(rows[label_col].tolist()),
-                        label_definitions=[[q] for q in rows["Query"]],
-                    )
-                )
-                if not segments:
-                    segments = rows["Segment"].tolist()
+        # One stable sort groups rows by document, then query, keeping the
+        # segment order inside each query
+        df = df.dropna(subset=["DocID", "QueryID"]).sort_values(
+            ["DocID", "QueryID"], kind="stable"
+        )
+        doc_ids = df["DocID"].to_numpy()
+        query_ids = df["QueryID"].to_numpy()
+        new_doc = np.ones(len(df), dtype=bool)
+        new_doc[1:] = doc_ids[1:] != doc_ids[:-1]
+        new_query = new_doc.copy()
+        new_query[1:] |= query_ids[1:] != query_ids[:-1]
+        # Row ranges of every query, and query ranges of every document
+        query_starts = np.flatnonzero(new_query)
+        query_ends = np.append(query_starts[1:], len(df))
+        doc_queries = np.append(
+            np.searchsorted(query_starts, np.flatnonzero(new_doc)), len(query_starts)
+        )
 
-            results[split].append(
+        labels = df[label_col].tolist()
+        queries = df["Query"].tolist()
+        segments = df["Segment"].tolist()
+        for first, last in zip(doc_queries[:-1], doc_queries[1:]):
+            classifications = [
+                Classification(
+                    level="sentence",
+                    labels=labels[start:end],
+                    label_definitions=[[q] for q in queries[start:end]],
+                )
+                for start, end in zip(query_starts[first:last], query_ends[first:last])
+            ]
+            # Every query of a document is asked against the same segments
+            start, end = query_starts[first], query_ends[first]
+            doc = Document(title=doc_ids[start], sentences=segments[start:end])
+            yield (
+                split,
                 DocumentClassification(
-                    document=Document(title=doc_id, sentences=segments),
+                    document=doc.compact() if compact else doc,
                     classifications=classifications,
-                ).model_dump_json()
+                ).model_dump(),
             )
 
-    return results
+
+def write(
+    sink: ParquetSink,
+    cache_dir: Path = Path.home() / ".cache" / "PrivacyQA",
+    keep_cache: bool = True,
+    compact: bool = False,
+):
+    with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
+        with stage("convert") as s:
+            for split, record in load_data(repo_path, compact=compact):
+                sink.write(record, split)
+            s.records = sum(sink.records.values())
 
 
 if __name__ == "__main__":
-    import pandas as pd
     import typer
     from rich import print
 
@@ -66,22 +105,14 @@ if __name__ == "__main__":
         cache_dir: Path = Path.home() / ".cache" / "PrivacyQA",
         push_to_hub: bool = False,
         keep_cache: bool = True,
+        compact: bool = False,
     ):
-        with download(keep_cache=keep_cache, cache_dir=cache_dir) as repo_path:
-            data = load_data(repo_path)
-
-        dataset = datasets.DatasetDict(
-            {
-                split: datasets.Dataset.from_pandas(
-                    pd.DataFrame(data[split], columns=["document"])
-                )
-                for split in data
-            }
-        )
-        print(
-            DocumentClassification.model_validate_json(dataset["test"]["document"][0])
+        dataset = to_dataset(
+            write, FEATURES, cache_dir=cache_dir, keep_cache=keep_cache, compact=compact
         )
 
+        print(DocumentClassification.model_validate(dataset["test"][0]))
+
         if push_to_hub:
             dataset.push_to_hub("chenghao/tos_pp_dataset", "privacy_glue/privacy_qa")
 
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generator
+
+from loguru import logger
+
+from tos_datasets.archive import Archive, ArchivePath
+from tos_datasets.instrument import stage
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Memos of `sha256_file`, kept out of the cloned and downloaded source trees
+SHA256_CACHE = Path.home() / ".cache" / "tos_datasets" / "sha256"
+# The digest of every URL the first time it was downloaded, see `download`
+DIGESTS = Path.home() / ".cache" / "tos_datasets" / "digests"
+
+
+class IncompleteDownloadError(IOError):
+    pass
+
+
+class ChecksumMismatchError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Source:
+    url: str
+    path: Path
+    sha256: str | None = None
+
+
+def _sha256(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_file(path: Path, root: Path = SHA256_CACHE) -> str:
+    """The SHA-256 of a file, memoized under `root` by path, size and mtime."""
+    path = path.resolve()
+    stat = path.stat()
+    memo_path = root / f"{hashlib.sha256(str(path).encode()).hexdigest()}.json"
+    if memo_path.exists():
+        memo = json.loads(memo_path.read_text())
+        if memo.get("size") == stat.st_size and memo.get("mtime") == stat.st_mtime:
+            return memo["sha256"]
+    digest = _sha256(path)
+    root.mkdir(parents=True, exist_ok=True)
+    memo_path.write_text(
+        json.dumps(
+            {
+                "path": str(path),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "sha256": digest,
+            }
+        )
+    )
+    return digest
+
+
+def _digest_path(url: str, root: Path) -> Path:
+    return root / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+
+def recorded_sha256(url: str, root: Path = DIGESTS) -> dict | None:
+    """The url, path and sha256 recorded by the first download of `url`."""
+    path = _digest_path(url, root)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def record_sha256(url: str, path: Path, sha256: str, root: Path = DIGESTS):
+    root.mkdir(parents=True, exist_ok=True)
+    _digest_path(url, root).write_text(
+        json.dumps({"url": url, "path": str(path.resolve()), "sha256": sha256})
+    )
+
+
+def _fetch(url: str, part: Path, chunk_size: int, timeout: float):
+    """Append the rest of `url` to `part`, resuming with a Range request."""
+    import requests
+
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with requests.get(url, stream=True, headers=headers, timeout=timeout) as response:
+        if offset and response.status_code == 416:
+            # The partial file already holds every byte
+            return
+        response.raise_for_status()
+        if response.status_code != 206:
+            # The server ignored the Range header and sent the whole file
+            offset = 0
+        length = response.headers.get("Content-Length")
+        expected = offset + int(length) if length is not None else None
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+    if expected is not None and part.stat().st_size != expected:
+        raise IncompleteDownloadError(
+            f"{url}: got {part.stat().st_size} of {expected} bytes"
+        )
+
+
+def download(
+    url: str,
+    path: Path,
+    sha256: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retries: int = 3,
+    timeout: float = 60,
+    digests: Path | None = DIGESTS,
+) -> Path:
+    """Download `url` to `path`, resuming interrupted transfers.
+
+    Bytes are streamed into `path.part` and only moved to `path` once the
+    transfer is complete and verified. Without a `sha256`, the first download
+    of `url` records its digest under `digests`. Later downloads of `url`, and
+    the recorded file when it already exists, are checked against it. Files
+    that were never downloaded, e.g. synthetic sources, are not recorded.
+    Pass `digests=None` to skip the records.
+    """
+    record = recorded_sha256(url, digests) if digests is not None else None
+    recorded = record["sha256"] if record is not None else None
+    try:
+        if path.exists():
+            # Only the file the digest was taken from, not other copies
+            if record is not None and record["path"] != str(path.resolve()):
+                recorded = None
+            expected = sha256 or recorded
+            if expected is not None and sha256_file(path) != expected:
+                raise ChecksumMismatchError(f"{path} does not match sha256 {expected}")
+            return path
+        _download(url, path, sha256 or recorded, chunk_size, retries, timeout)
+    except ChecksumMismatchError as error:
+        if sha256 is None:
+            raise ChecksumMismatchError(
+                f"{error}, recorded by its first download; delete "
+                f"{_digest_path(url, digests)} if the source has changed"
+            ) from error
+        raise
+    if digests is not None and record is None:
+        record_sha256(url, path, sha256_file(path), digests)
+    return path
+
+
+def _download(
+    url: str,
+    path: Path,
+    sha256: str | None,
+    chunk_size: int,
+    retries: int,
+    timeout: float,
+):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    import requests
+
+    part = path.with_name(path.name + ".part")
+    for attempt in range(1, retries + 1):
+        try:
+            _fetch(url, part, chunk_size, timeout)
+            break
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+            IncompleteDownloadError,
+        ):
+            if attempt == retries:
+                raise
+            logger.warning(f"{url}: attempt {attempt} interrupted, resuming")
+
+    if sha256 is not None:
+        digest = _sha256(part, chunk_size)
+        if digest != sha256:
+            part.unlink()
+            raise ChecksumMismatchError(
+                f"{url}: expected sha256 {sha256}, got {digest}"
+            )
+    part.replace(path)
+
+
+def download_many(
+    sources: list[Source],
+    max_workers: int = 4,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[Path]:
+    """Download several sources concurrently, in the order given."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(
+            pool.map(
+                lambda source: download(
+                    source.url, source.path, source.sha256, chunk_size
+                ),
+                sources,
+            )
+        )
+
+
+@contextmanager
+def download_archive(
+    url: str,
+    zip_path: Path,
+    root: str = "",
+    keep_cache: bool = True,
+    sha256: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    digests: Path | None = DIGESTS,
+) -> Generator[ArchivePath, None, None]:
+    """Download a zip archive and read its `root` directory in place.
+
+    The archive is verified as in `download`, against `sha256` or the digest
+    recorded by its first download.
+    """
+    if zip_path.exists() and not zipfile.is_zipfile(zip_path):
+        logger.warning(f"{zip_path} is not a complete zip archive, downloading again")
+        zip_path.unlink()
+    with stage("download"):
+        download(url, zip_path, sha256=sha256, chunk_size=chunk_size, digests=digests)
+
+    with Archive(zip_path) as archive:
+        yield archive / root
+        extract_dir = archive.extract_dir
+
+    if not keep_cache:
+        # Only what this download created, never the rest of `cache_dir`
+        zip_path.unlink(missing_ok=True)
+        zip_path.with_name(zip_path.name + ".part").unlink(missing_ok=True)
+        shutil.rmtree(extract_dir, ignore_errors=True)
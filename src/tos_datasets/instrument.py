@@ -0,0 +1,143 @@
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Generator
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class Stage:
+    """Timings of one stage; set `records` to get a throughput."""
+
+    name: str
+    seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: float | None = None
+    records: int | None = None
+
+    @property
+    def records_per_second(self) -> float | None:
+        if self.records is None or not self.seconds:
+            return None
+        return self.records / self.seconds
+
+    def __str__(self) -> str:
+        text = f"{self.name}: {self.seconds:.2f}s wall, {self.cpu_seconds:.2f}s CPU"
+        if self.peak_rss_mb is not None:
+            text += f", peak RSS {self.peak_rss_mb:.0f} MB"
+        if self.records is not None:
+            text += f", {self.records} records"
+            if self.records_per_second is not None:
+                text += f" ({self.records_per_second:.0f}/s)"
+        return text
+
+
+@dataclass
+class Report:
+    """The stages of one subset build, written to `path` as JSON."""
+
+    subset: str
+    path: Path
+    # The stage to run under cProfile, its stats go next to the report
+    profile: str | None = None
+    stages: list[Stage] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def profile_path(self, stage: str) -> Path:
+        return self.path.with_name(f"{self.path.stem}.{stage}.prof")
+
+    def to_dict(self) -> dict:
+        return {
+            "subset": self.subset,
+            "seconds": self.seconds,
+            "stages": [
+                asdict(stage) | {"records_per_second": stage.records_per_second}
+                for stage in self.stages
+            ],
+        }
+
+
+_report: ContextVar[Report | None] = ContextVar("report", default=None)
+_stages: ContextVar[tuple[str, ...]] = ContextVar("stages", default=())
+
+
+def _cpu_seconds() -> float:
+    # Worker processes are counted once they have been joined
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) * (1 if sys.platform == "darwin" else 1 << 10)
+
+
+@contextmanager
+def stage(name: str) -> Generator[Stage, None, None]:
+    """Time a stage and log its wall time, CPU time, peak RSS and throughput.
+
+    Nested stages are named by their path, e.g. `build/convert`. Within a
+    `report`, the stage is also added to the report, and run under cProfile
+    when it is the report's `profile` stage. Peak RSS is the high-water mark
+    of this process and its joined workers at the end of the stage.
+    """
+    names = _stages.get() + (name,)
+    token = _stages.set(names)
+    report = _report.get()
+    record = Stage("/".join(names))
+    profiler = None
+    if report is not None and report.profile == name:
+        profiler = cProfile.Profile()
+    start, cpu = time.perf_counter(), _cpu_seconds()
+    try:
+        if profiler is not None:
+            with profiler:
+                yield record
+        else:
+            yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        record.cpu_seconds = _cpu_seconds() - cpu
+        record.peak_rss_mb = _peak_rss_mb()
+        _stages.reset(token)
+        if report is not None:
+            report.stages.append(record)
+            if profiler is not None:
+                report.path.parent.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(report.profile_path(name))
+        logger.info(f"{report.subset}/{record}" if report else str(record))
+
+
+@contextmanager
+def report(
+    subset: str, path: Path, profile: str | None = None
+) -> Generator[Report, None, None]:
+    """Collect the stages run inside the block and write them to `path` as JSON."""
+    current = Report(subset, path, profile)
+    token = _report.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _report.reset(token)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(current.to_dict(), indent=2))
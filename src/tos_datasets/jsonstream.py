@@ -0,0 +1,87 @@
+import json
+from typing import Any, Iterator, TextIO
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+_decoder = json.JSONDecoder()
+_NUMBER_CHARS = set("0123456789+-.eE")
+
+
+class _Buffer:
+    """A read-ahead window over a text stream."""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        # Growing the read with the buffer keeps retries on a large value linear
+        chunk = self.f.read(max(self.chunk_size, len(self.text) - self.pos))
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or "" at the end of the stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos : self.pos + 1]
+            self.fill()
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number cut by the end of the window decodes as a shorter one
+                if self.eof or (
+                    end < len(self.text) and self.text[end] not in _NUMBER_CHARS
+                ):
+                    self.pos = end
+                    return value
+            self.fill()
+
+
+def iter_array(
+    f: TextIO, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """Yield the items of the `key` array of a top-level JSON object one by one.
+
+    Only the current item and a read-ahead window are held in memory. Other
+    top-level values are decoded and dropped.
+    """
+    buffer = _Buffer(f, chunk_size)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+    while True:
+        name = buffer.value()
+        buffer.expect(":")
+        if name != key:
+            buffer.value()
+        else:
+            buffer.expect("[")
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.expect(",]") == "]":
+                        break
+        if buffer.expect(",}") == "}":
+            return
@@ -0,0 +1,65 @@
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import TypeVar
+
+R = TypeVar("R")
+
+DEFAULT_CHUNK_SIZE = 16
+
+
+def workers(jobs: int | None = None) -> int:
+    """The number of processes `jobs` stands for, all cores when None."""
+    return jobs or os.cpu_count() or 1
+
+
+def _apply(fn: Callable[..., R], chunk: list[tuple]) -> list[R]:
+    return [fn(*args) for args in chunk]
+
+
+def istarmap(
+    fn: Callable[..., R],
+    items: Iterable[tuple],
+    jobs: int | None = None,
+    chunksize: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[R]:
+    """Lazily apply `fn(*item)` to `items` in a process pool, keeping their order.
+
+    Items are read and submitted `chunksize` at a time, with at most two
+    chunks in flight per worker, so a generator over a large corpus is never
+    materialized. Workers return finished records and results are yielded in
+    input order, so the output is exactly that of `itertools.starmap`.
+
+    With a single worker the map runs in this process, as a pool would only
+    add start-up and pickling costs.
+    """
+    n = workers(jobs)
+    if n == 1:
+        for args in items:
+            yield fn(*args)
+        return
+
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=n) as pool:
+        pending: deque[Future[list[R]]] = deque()
+        while True:
+            while len(pending) < 2 * n:
+                chunk = list(islice(items, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_apply, fn, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def imap(
+    fn: Callable[..., R],
+    *iterables: Iterable,
+    jobs: int | None = None,
+    chunksize: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[R]:
+    """`istarmap` over the zipped `iterables`, like `Executor.map`."""
+    return istarmap(fn, zip(*iterables), jobs=jobs, chunksize=chunksize)
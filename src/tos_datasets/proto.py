@@ -1,6 +1,42 @@
-from typing import Annotated, Optional
+from collections.abc import Iterable, Sequence
+from functools import cache
+from typing import Annotated, Literal, Optional, TypeVar, overload
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationInfo, model_validator
+from pydantic_core import from_json
+
+from tos_datasets.spans import IntervalIndex
+
+Unit = Literal["paragraphs", "sentences", "tokens"]
+UNITS: tuple[Unit, ...] = ("paragraphs", "sentences", "tokens")
+# How units are joined when a document without text is compacted
+SEPARATORS: dict[Unit, str] = {"paragraphs": "", "sentences": "\n", "tokens": " "}
+
+
+class TextSpans(Sequence[str]):
+    """A read-only view of `text` that slices each (start, end) span on access."""
+
+    def __init__(self, text: str, spans: list[tuple[int, int]]):
+        self.text = text
+        self.spans = spans
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.text[start:end] for start, end in self.spans[index]]
+        start, end = self.spans[index]
+        return self.text[start:end]
+
+    def __repr__(self) -> str:
+        return f"TextSpans(<{len(self)} spans>)"
 
 
 class Document(BaseModel):
@@ -10,9 +46,23 @@ class Document(BaseModel):
     sentences: Annotated[Optional[list[str]], "The sentences of the document"] = None
     tokens: Annotated[Optional[list[str]], "The tokens of the document"] = None
     language: Annotated[Optional[str], "The language of the document"] = None
+    paragraph_spans: Annotated[
+        Optional[list[tuple[int, int]]],
+        "The (start, end) offsets of the paragraphs in the text, end exclusive",
+    ] = None
+    sentence_spans: Annotated[
+        Optional[list[tuple[int, int]]],
+        "The (start, end) offsets of the sentences in the text, end exclusive",
+    ] = None
+    token_spans: Annotated[
+        Optional[list[tuple[int, int]]],
+        "The (start, end) offsets of the tokens in the text, end exclusive",
+    ] = None
 
     @model_validator(mode="before")
-    def check_at_least_one(cls, data: dict) -> dict:
+    def check_at_least_one(cls, data: dict, info: ValidationInfo) -> dict:
+        if info.context and info.context.get("trusted"):
+            return data
         if not any(
             [
                 data.get("text"),
@@ -26,6 +76,71 @@ class Document(BaseModel):
             )
         return data
 
+    def spans(self, unit: Unit) -> list[tuple[int, int]] | None:
+        """The offsets of each paragraph, sentence or token in the text.
+
+        Materialized units are located in `text` from left to right; a document
+        without text is treated as its units joined by `SEPARATORS[unit]`.
+        """
+        stored = getattr(self, f"{unit[:-1]}_spans")
+        if stored is not None:
+            return stored
+        units = getattr(self, unit)
+        if units is None:
+            return None
+        if self.text is None:
+            return _joined_spans(units, SEPARATORS[unit])
+        spans = []
+        cursor = 0
+        for segment in units:
+            start = self.text.find(segment, cursor)
+            if start < 0:
+                raise ValueError(f"Cannot locate {unit[:-1]} {segment!r} in the text")
+            cursor = start + len(segment)
+            spans.append((start, cursor))
+        return spans
+
+    def view(self, unit: Unit) -> Sequence[str] | None:
+        """The paragraphs, sentences or tokens, sliced lazily in compact mode."""
+        units = getattr(self, unit)
+        if units is not None:
+            return units
+        spans = getattr(self, f"{unit[:-1]}_spans")
+        if spans is None or self.text is None:
+            return None
+        return TextSpans(self.text, spans)
+
+    def compact(self) -> "Document":
+        """Keep a single text buffer and replace each unit list by its offsets."""
+        text = self.text
+        if text is None:
+            unit = next(u for u in UNITS if getattr(self, u))
+            text = SEPARATORS[unit].join(getattr(self, unit))
+        update = {"text": text}
+        base = self.model_copy(update=update)
+        for unit in UNITS:
+            update[unit] = None
+            update[f"{unit[:-1]}_spans"] = base.spans(unit)
+        return self.model_copy(update=update)
+
+    def materialize(self) -> "Document":
+        """The inverse of `compact`: turn offsets back into lists of strings."""
+        update = {}
+        for unit in UNITS:
+            view = self.view(unit)
+            update[unit] = list(view) if view is not None else None
+            update[f"{unit[:-1]}_spans"] = None
+        return self.model_copy(update=update)
+
+
+def _joined_spans(units: list[str], separator: str) -> list[tuple[int, int]]:
+    spans = []
+    cursor = 0
+    for segment in units:
+        spans.append((cursor, cursor + len(segment)))
+        cursor += len(segment) + len(separator)
+    return spans
+
 
 class QA(BaseModel):
     question: Annotated[str, "The question to answer"]
@@ -64,16 +179,40 @@ class DocumentSequenceClassification(BaseModel):
     document: Document = Field(..., description="The document")
     tags: list[Tag] = Field(..., description="The annotations of the document")
 
+    def build_span_index(self) -> IntervalIndex[Tag]:
+        """An interval index over `tags`, as they are now.
+
+        Keep it for as many queries as needed, and build a new one after
+        editing `tags`.
+        """
+        return IntervalIndex((tag.start, tag.end, tag) for tag in self.tags)
+
 
 class DocumentEvent(BaseModel):
     document: Document = Field(..., description="The document")
     events: list[Event] = Field(..., description="The events of the document")
 
+    def build_span_index(self) -> IntervalIndex[tuple[Event, Tag]]:
+        """An interval index over (event, tag) pairs for every trigger and argument."""
+        return IntervalIndex(
+            (tag.start, tag.end, (event, tag))
+            for event in self.events
+            for tag in [event.trigger, *event.arguments]
+        )
+
 
 class DocumentQA(BaseModel):
     document: Document = Field(..., description="The document to answer the question")
     qas: list[QA] = Field(..., description="The questions and answers to the document")
 
+    def build_span_index(self) -> IntervalIndex[QA]:
+        """An interval index over the answered `qas`."""
+        return IntervalIndex(
+            (qa.start, qa.end, qa)
+            for qa in self.qas
+            if qa.start is not None and qa.end is not None
+        )
+
 
 class DocumentClassification(BaseModel):
     document: Annotated[Document, "The document to classify"]
@@ -111,3 +250,46 @@ class DocumentEUConsumerLawAnnotation(BaseModel):
     annotations: Annotated[
         list[EUConsumerLawAnnotation], "The annotations of the document"
     ]
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@cache
+def adapter(model: type[M]) -> TypeAdapter[list[M]]:
+    """A cached `TypeAdapter` for lists of `model`."""
+    return TypeAdapter(list[model])
+
+
+def validate_many(
+    model: type[M], rows: Iterable[str | bytes | dict], trusted: bool = False
+) -> list[M]:
+    """Validate a batch of JSON strings or dicts into `model` instances.
+
+    With `trusted=True` the Python-level validators, i.e.
+    `Document.check_at_least_one`, are skipped. Only use it for data produced
+    by this library.
+    """
+    context = {"trusted": True} if trusted else None
+    rows = [from_json(row) if isinstance(row, (str, bytes)) else row for row in rows]
+    return adapter(model).validate_python(rows, context=context)
+
+
+@overload
+def dump_many(
+    documents: Sequence[M], mode: Literal["python"] = "python"
+) -> list[dict]: ...
+
+
+@overload
+def dump_many(documents: Sequence[M], mode: Literal["json"]) -> bytes: ...
+
+
+def dump_many(documents, mode="python"):
+    """Serialize a batch of models in one call, as dicts or a JSON array."""
+    if not documents:
+        return [] if mode == "python" else b"[]"
+    model_adapter = adapter(type(documents[0]))
+    if mode == "json":
+        return model_adapter.dump_json(documents)
+    return model_adapter.dump_python(documents)
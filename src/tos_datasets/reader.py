@@ -0,0 +1,115 @@
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Generic, TypeVar, overload
+
+from pydantic import BaseModel
+
+from tos_datasets.proto import validate_many
+from tos_datasets.registry import HUB_REPO, SUBSETS
+
+if TYPE_CHECKING:
+    import datasets
+
+M = TypeVar("M", bound=BaseModel)
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_BATCH_SIZE = 256
+
+
+class Reader(Sequence[M], Generic[M]):
+    """A split whose rows are decoded into proto models on access.
+
+    Indexing decodes one row and keeps it in an LRU cache of `cache_size`
+    models; slices and iteration decode whole Arrow batches and bypass the
+    cache. Rows of a subset with one document per column, i.e. PolicyIE,
+    decode into a `{column: model}` dict.
+    """
+
+    def __init__(
+        self,
+        dataset: "datasets.Dataset",
+        model: type[M] | dict[str, type[BaseModel]],
+        cache_size: int | None = DEFAULT_CACHE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.dataset = dataset
+        self.model = model
+        self.batch_size = batch_size
+        self._table = dataset.with_format("arrow")
+        self._row = lru_cache(maxsize=cache_size)(self._decode_row)
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    @overload
+    def __getitem__(self, index: int) -> M: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[M]: ...
+
+    def __getitem__(self, index: int | slice) -> M | list[M]:
+        if isinstance(index, slice):
+            indices = range(len(self))[index]
+            if indices.step != 1:
+                return [self._row(i) for i in indices]
+            return self.decode(self._table[indices.start : indices.stop].to_pylist())
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"index {index} out of range for {len(self)} rows")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[M]:
+        for batch in self.iter_batches():
+            yield from batch
+
+    def __repr__(self) -> str:
+        return f"Reader({self.dataset.split or 'dataset'}, rows={len(self)})"
+
+    def _decode_row(self, index: int) -> M:
+        return self.decode(self._table[index : index + 1].to_pylist())[0]
+
+    def decode(self, rows: list[dict]) -> list[M]:
+        """Validate rows of this split, as plain dicts, in one batch."""
+        if not isinstance(self.model, dict):
+            return validate_many(self.model, rows, trusted=True)
+        columns = {
+            column: validate_many(model, [row[column] for row in rows], trusted=True)
+            for column, model in self.model.items()
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def iter_batches(self, batch_size: int | None = None) -> Iterator[list[M]]:
+        """Decode the split in order, `batch_size` rows at a time."""
+        for table in self._table.iter(batch_size=batch_size or self.batch_size):
+            yield self.decode(table.to_pylist())
+
+    def cache_info(self):
+        return self._row.cache_info()
+
+    def cache_clear(self):
+        self._row.cache_clear()
+
+
+def load(
+    subset: str,
+    split: str = "train",
+    path: str | Path | None = None,
+    cache_size: int | None = DEFAULT_CACHE_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Reader:
+    """Read a split of a subset as proto models.
+
+    The split comes from the Hub, or from the output directory of a local
+    build when `path` is given, e.g. `output/cuad`.
+    """
+    import datasets
+
+    if subset not in SUBSETS:
+        raise KeyError(f"Unknown subset {subset!r}, expected one of {list(SUBSETS)}")
+    if path is None:
+        dataset = datasets.load_dataset(HUB_REPO, subset, split=split)
+    else:
+        dataset = datasets.load_dataset(str(path), split=split)
+    return Reader(dataset, SUBSETS[subset].proto, cache_size, batch_size)
@@ -0,0 +1,114 @@
+import inspect
+from dataclasses import dataclass
+from importlib import import_module
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import datasets
+    from pydantic import BaseModel
+
+HUB_REPO = "chenghao/tos_pp_dataset"
+
+
+@dataclass(frozen=True)
+class Subset:
+    name: str
+    module: str
+    # The downloaded archive inside `cache_dir`, empty for cloned repositories
+    source: str = ""
+    # The `tos_datasets.proto` model of every row, see `proto`
+    model: str = "DocumentClassification"
+    # `(column, model)` pairs for rows that hold one document per column
+    columns: tuple[tuple[str, str], ...] = ()
+
+    @property
+    def write(self) -> Callable[..., None]:
+        """The converter's `write(sink, ...)`, imported on first use."""
+        return import_module(self.module).write
+
+    @property
+    def features(self) -> "datasets.Features":
+        """The features of the converter's records."""
+        return import_module(self.module).FEATURES
+
+    @property
+    def proto(self) -> "type[BaseModel] | dict[str, type[BaseModel]]":
+        """The model of a row, or of each of its columns."""
+        proto = import_module("tos_datasets.proto")
+        if self.columns:
+            return {column: getattr(proto, model) for column, model in self.columns}
+        return getattr(proto, self.model)
+
+    @property
+    def cache_dir(self) -> Path:
+        return inspect.signature(self.write).parameters["cache_dir"].default
+
+    @property
+    def source_path(self) -> Path:
+        return self.cache_dir / self.source
+
+    @property
+    def url(self) -> str | None:
+        """Where the source archive is downloaded from, None for repositories."""
+        if not self.source:
+            return None
+        return import_module(self.module).URL
+
+
+SUBSETS: dict[str, Subset] = {
+    subset.name: subset
+    for subset in [
+        Subset("cuad", "tos_datasets.converters.cuad", "CUAD_v1.zip", "DocumentQA"),
+        Subset(
+            "100_tos",
+            "tos_datasets.converters.one_hundread_tos",
+            "100_tos.zip",
+            "DocumentEUConsumerLawAnnotation",
+        ),
+        Subset(
+            "142_tos",
+            "tos_datasets.converters.one_hundread_and_fourty_two",
+            "142_tos.zip",
+        ),
+        Subset("memnet_tos", "tos_datasets.converters.memnet_tos"),
+        Subset(
+            "multilingual_unfair_clause",
+            "tos_datasets.converters.multilingual_unfair_clause",
+        ),
+        Subset("10_tos", "tos_datasets.converters.ten_tos"),
+        Subset(
+            "privacy_glue/policy_qa",
+            "tos_datasets.converters.policy_qa",
+            model="DocumentQA",
+        ),
+        Subset(
+            "privacy_glue/policy_ie",
+            "tos_datasets.converters.policy_ie",
+            columns=(
+                ("type_i", "DocumentSequenceClassification"),
+                ("type_ii", "DocumentEvent"),
+            ),
+        ),
+        Subset(
+            "privacy_glue/policy_detection", "tos_datasets.converters.privacy_policy"
+        ),
+        Subset("privacy_glue/polisis", "tos_datasets.converters.polisis"),
+        Subset("privacy_glue/privacy_qa", "tos_datasets.converters.privacy_qa"),
+        Subset(
+            "privacy_glue/piextract",
+            "tos_datasets.converters.piextract",
+            model="DocumentSequenceClassification",
+        ),
+    ]
+}
+
+
+def resolve(names: list[str]) -> list[Subset]:
+    """Expand `all` and validate subset names, keeping the registry order."""
+    if "all" in names:
+        return list(SUBSETS.values())
+    unknown = [name for name in names if name not in SUBSETS]
+    if unknown:
+        raise KeyError(f"Unknown subsets: {', '.join(unknown)}")
+    return [SUBSETS[name] for name in dict.fromkeys(names)]
@@ -0,0 +1,46 @@
+import types
+from typing import Annotated, Any, Union, get_args, get_origin
+
+import datasets
+from pydantic import BaseModel
+
+SCALARS = {
+    str: "string",
+    int: "int64",
+    float: "float64",
+    bool: "bool",
+}
+
+
+def feature(annotation: Any) -> Any:
+    """Map a type annotation from `tos_datasets.proto` to a `datasets` feature.
+
+    Models become structs, lists become Arrow lists and optional fields become
+    nullable values of their inner type.
+    """
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return feature(get_args(annotation)[0])
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            raise TypeError(f"Unsupported union: {annotation!r}")
+        return feature(args[0])
+    if origin in (list, tuple):
+        args = [arg for arg in get_args(annotation) if arg is not Ellipsis]
+        if len(set(args)) != 1:
+            raise TypeError(f"Unsupported sequence: {annotation!r}")
+        return [feature(args[0])]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {
+            name: feature(field.annotation)
+            for name, field in annotation.model_fields.items()
+        }
+    if annotation in SCALARS:
+        return datasets.Value(SCALARS[annotation])
+    raise TypeError(f"Unsupported annotation: {annotation!r}")
+
+
+def features(model: type[BaseModel]) -> datasets.Features:
+    """The top-level columns of a dataset storing one `model` per row."""
+    return datasets.Features(feature(model))
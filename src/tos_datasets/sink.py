@@ -0,0 +1,233 @@
+import json
+import shutil
+import tempfile
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+import datasets
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_MAX_SHARD_BYTES = 256 << 20
+DEFAULT_BATCH_SIZE = 1000
+
+
+class _SplitWriter:
+    """The shards of one split, rotated once they reach `max_shard_bytes`."""
+
+    def __init__(self, directory: Path, split: str, schema: pa.Schema, max_bytes: int):
+        self.directory = directory
+        self.split = split
+        self.schema = schema
+        self.max_bytes = max_bytes
+        self.shards: list[Path] = []
+        self.writer: pq.ParquetWriter | None = None
+        self.shard_bytes = 0
+        self.rows = 0
+
+    def write(self, table: pa.Table):
+        if self.writer is None or self.shard_bytes >= self.max_bytes:
+            self.rotate()
+        self.writer.write_table(table)
+        self.shard_bytes += table.nbytes
+        self.rows += table.num_rows
+
+    def rotate(self):
+        if self.writer is not None:
+            self.writer.close()
+        path = (
+            self.directory / f"{self.split}-{len(self.shards):05d}.parquet.incomplete"
+        )
+        self.shards.append(path)
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.shard_bytes = 0
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def close(self) -> list[Path]:
+        if self.writer is None:
+            # `datasets` cannot read a Parquet file without rows
+            return []
+        self.writer.close()
+        total = len(self.shards)
+        paths = []
+        for i, shard in enumerate(self.shards):
+            path = self.directory / f"{self.split}-{i:05d}-of-{total:05d}.parquet"
+            shard.replace(path)
+            paths.append(path)
+        return paths
+
+
+class ParquetSink:
+    """Stream records into size-bounded Parquet shards, one set per split.
+
+    Shards are written as `directory/data/<split>-00000-of-00002.parquet`, the
+    layout of the Hub, so `datasets.load_dataset(str(directory))` loads the
+    result with its exact features. Only one batch of records is held in
+    memory at a time, and a split without records is left out.
+
+    Metadata that holds for the whole subset, e.g. label definitions, is
+    `attach`ed as a JSON file next to `data/` rather than repeated in rows.
+
+    Everything is written to a staging directory inside `directory` and only
+    replaces the previous output on `close`. Used as a context manager, the
+    block must succeed for that to happen; when it raises, the staged files
+    are deleted and the previous output is left as it was.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        features: datasets.Features,
+        max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.directory = directory
+        self.features = features
+        # Carries the `datasets` features in the Parquet metadata
+        self.schema = features.arrow_schema
+        self.max_shard_bytes = max_shard_bytes
+        self.batch_size = batch_size
+        self.splits: dict[str, _SplitWriter] = {}
+        self.buffers: dict[str, list[dict]] = {}
+        # The number of records written to each split
+        self.records: dict[str, int] = {}
+        # JSON files written next to `data/` on `close`, by name
+        self.files: dict[str, object] = {}
+        directory.mkdir(parents=True, exist_ok=True)
+        # On the same file system as the output, so it is swapped in by renames
+        self.staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=directory))
+        (self.staging / "data").mkdir()
+
+    def __enter__(self) -> "ParquetSink":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _split(self, split: str) -> _SplitWriter:
+        if split not in self.splits:
+            self.splits[split] = _SplitWriter(
+                self.staging / "data", split, self.schema, self.max_shard_bytes
+            )
+            self.buffers[split] = []
+            self.records[split] = 0
+        return self.splits[split]
+
+    def _flush(self, split: str):
+        if self.buffers[split]:
+            table = pa.Table.from_pylist(self.buffers[split], schema=self.schema)
+            self.splits[split].write(table)
+            self.buffers[split] = []
+
+    def write(self, record: dict, split: str = "train"):
+        self._split(split)
+        self.buffers[split].append(record)
+        self.records[split] += 1
+        if len(self.buffers[split]) >= self.batch_size:
+            self._flush(split)
+
+    def write_all(self, records: Iterable[dict], split: str = "train") -> int:
+        """Write every record to `split` and return how many there were."""
+        count = 0
+        for count, record in enumerate(records, 1):
+            self.write(record, split)
+        return count
+
+    def attach(self, name: str, data: object):
+        """Write `data` as `directory / name` along with the shards."""
+        self.files[name] = data
+
+    def abort(self):
+        """Delete the staged shards, leaving the previous output in place."""
+        for writer in self.splits.values():
+            writer.abort()
+        self.splits.clear()
+        self.buffers.clear()
+        self.files.clear()
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def close(self) -> dict[str, list[Path]]:
+        """Finish every split and swap in the new output, returning its shards."""
+        shards = {}
+        for split in self.splits:
+            self._flush(split)
+            if paths := self.splits[split].close():
+                shards[split] = [self.directory / "data" / p.name for p in paths]
+        self.splits.clear()
+        for name, data in self.files.items():
+            (self.staging / name).write_text(
+                json.dumps(data, ensure_ascii=False, indent=2)
+            )
+        self.files.clear()
+
+        # The previous shards and attached files are moved into the staging
+        # directory, which is deleted last
+        previous = self.staging / "previous"
+        previous.mkdir()
+        if (self.directory / "data").exists():
+            (self.directory / "data").replace(previous / "data")
+        for path in attachments(self.directory):
+            path.replace(previous / path.name)
+        (self.staging / "data").replace(self.directory / "data")
+        for path in attachments(self.staging):
+            path.replace(self.directory / path.name)
+        shutil.rmtree(self.staging)
+        return shards
+
+
+def load(directory: Path) -> datasets.DatasetDict:
+    """Load the shards written by a `ParquetSink`."""
+    return datasets.load_dataset(str(directory))
+
+
+def attachments(directory: Path) -> list[Path]:
+    """The files `attach`ed to the shards under `directory`."""
+    return sorted(path for path in directory.glob("*.json") if path.is_file())
+
+
+def count(directory: Path) -> dict[str, int]:
+    """The number of records of each split, read from the shard footers."""
+    counts: dict[str, int] = {}
+    for path in sorted((directory / "data").glob("*.parquet")):
+        split = path.name.split("-")[0]
+        counts[split] = counts.get(split, 0) + pq.ParquetFile(path).metadata.num_rows
+    return counts
+
+
+def push(directory: Path, repo_id: str, config_name: str):
+    """Push the shards under `directory`, and the files attached to them."""
+    from huggingface_hub import HfApi
+
+    load(directory).push_to_hub(repo_id, config_name)
+    api = HfApi()
+    for path in attachments(directory):
+        api.upload_file(
+            path_or_fileobj=path,
+            path_in_repo=f"{config_name}/{path.name}",
+            repo_id=repo_id,
+            repo_type="dataset",
+        )
+
+
+def to_dataset(
+    write: Callable[..., None],
+    features: datasets.Features,
+    directory: Path | None = None,
+    **kwargs,
+) -> datasets.DatasetDict:
+    """Run a converter's `write` into shards under `directory` and load them.
+
+    The shards are written to a temporary directory when `directory` is None.
+    """
+    if directory is not None:
+        with ParquetSink(directory, features) as sink:
+            write(sink, **kwargs)
+        return load(directory)
+    with tempfile.TemporaryDirectory() as tmp:
+        return to_dataset(write, features, Path(tmp), **kwargs)
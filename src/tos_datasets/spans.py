@@ -0,0 +1,135 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+# (start, end, position of the span in `IntervalIndex.spans`)
+Span = tuple[int, int, int]
+
+
+@dataclass
+class _Node:
+    center: int
+    # Spans containing `center`, sorted by start ascending and by end descending
+    by_start: list[Span]
+    by_end: list[Span]
+    left: "_Node | None"
+    right: "_Node | None"
+
+
+def _build(spans: list[Span]) -> _Node | None:
+    # Centering on the median start keeps the span it came from at this node, so
+    # every level makes progress and each subtree holds at most half the spans.
+    if not spans:
+        return None
+    center = sorted(start for start, _, _ in spans)[len(spans) // 2]
+    here, left, right = [], [], []
+    for span in spans:
+        if span[1] <= center:
+            left.append(span)
+        elif span[0] > center:
+            right.append(span)
+        else:
+            here.append(span)
+    return _Node(
+        center=center,
+        by_start=sorted(here, key=lambda x: x[0]),
+        by_end=sorted(here, key=lambda x: -x[1]),
+        left=_build(left),
+        right=_build(right),
+    )
+
+
+class IntervalIndex(Generic[T]):
+    """A static centered interval tree over half-open `[start, end)` spans.
+
+    Point and overlap queries run in O(log n + k) for k results. `within` and
+    `containing` additionally filter candidates sharing a boundary with the
+    query window. Results are returned ordered by (start, end).
+    """
+
+    def __init__(self, spans: Iterable[tuple[int, int, T]]):
+        ordered = sorted(spans, key=lambda x: (x[0], x[1]))
+        self.items: list[T] = [item for _, _, item in ordered]
+        self.spans: list[Span] = [(s, e, i) for i, (s, e, _) in enumerate(ordered)]
+        self._starts = [start for start, _, _ in self.spans]
+        self._ends = sorted((end, i) for _, end, i in self.spans)
+        # Empty spans never contain a position, only the sorted arrays see them
+        self._root = _build([span for span in self.spans if span[0] < span[1]])
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def _stab(self, position: int) -> list[Span]:
+        found = []
+        node = self._root
+        while node is not None:
+            if position < node.center:
+                for span in node.by_start:
+                    if span[0] > position:
+                        break
+                    found.append(span)
+                node = node.left
+            elif position > node.center:
+                for span in node.by_end:
+                    if span[1] <= position:
+                        break
+                    found.append(span)
+                node = node.right
+            else:
+                found.extend(node.by_start)
+                break
+        return found
+
+    def _collect(self, spans: Iterable[Span]) -> list[T]:
+        return [self.items[i] for i in sorted(span[2] for span in spans)]
+
+    def at(self, position: int) -> list[T]:
+        """Items whose span contains `position`."""
+        return self._collect(self._stab(position))
+
+    def overlapping(self, start: int, end: int) -> list[T]:
+        """Items whose span shares at least one character with `[start, end)`."""
+        if end <= start:
+            return []
+        lo = bisect_right(self._starts, start)
+        hi = bisect_left(self._starts, end, lo)
+        # Empty spans hold no character, even when they sit inside the window
+        return self._collect(
+            self._stab(start)
+            + [span for span in self.spans[lo:hi] if span[0] < span[1]]
+        )
+
+    def within(self, start: int, end: int) -> list[T]:
+        """Items whose span lies entirely inside `[start, end)`."""
+        lo = bisect_left(self._starts, start)
+        hi = bisect_right(self._starts, end, lo)
+        return self._collect(span for span in self.spans[lo:hi] if span[1] <= end)
+
+    def containing(self, start: int, end: int) -> list[T]:
+        """Items whose span covers the whole of `[start, end)`."""
+        end = max(end, start + 1)
+        return self._collect(span for span in self._stab(start) if span[1] >= end)
+
+    def nearest(self, position: int) -> list[T]:
+        """Items containing `position`, or else the ones closest to it."""
+        found = self._stab(position)
+        if found:
+            return self._collect(found)
+        candidates = []
+        after = bisect_left(self._starts, position)
+        if after < len(self._starts):
+            start = self._starts[after]
+            hi = bisect_right(self._starts, start, after)
+            candidates.extend((start - position, i) for i in range(after, hi))
+        before = bisect_right(self._ends, (position, len(self.spans)))
+        if before > 0:
+            end = self._ends[before - 1][0]
+            lo = bisect_left(self._ends, (end, -1))
+            candidates.extend((position - end, i) for _, i in self._ends[lo:before])
+        if not candidates:
+            return []
+        best = min(distance for distance, _ in candidates)
+        return [self.items[i] for i in sorted({i for d, i in candidates if d == best})]
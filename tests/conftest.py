@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The checks of `benchmarks/` are run as tests too
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
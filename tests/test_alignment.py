@@ -0,0 +1,28 @@
+import pytest
+
+from tos_datasets.alignment import align
+from tos_datasets.converters.piextract import detokenizer
+
+
+def test_offsets_slice_the_tokens():
+    tokens = ["We", "collect", "your", "e-mail", "."]
+    text = "We collect your e-mail."
+    spans = align(tokens, text)
+    assert [text[start:end] for start, end in spans] == tokens
+
+
+def test_repeated_tokens_are_matched_in_order():
+    assert align(["a", "b", "a"], "a b a") == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_treebank_quotes_follow_the_detokenizer():
+    tokens = ["We", "say", "``", "hi", "''", "to", "-LRB-", "you", "-RRB-", "."]
+    text = detokenizer().detokenize(tokens)
+    spans = align(tokens, text)
+    assert [text[start:end] for start, end in spans][2:5] == ['"', "hi", '"']
+    assert all(end <= start for (_, end), (start, _) in zip(spans, spans[1:]))
+
+
+def test_missing_token_raises():
+    with pytest.raises(ValueError, match="'b'"):
+        align(["a", "b"], "a c")
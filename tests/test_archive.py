@@ -0,0 +1,54 @@
+import os
+import pickle
+import zipfile
+from pathlib import Path
+
+from tos_datasets.archive import Archive, open_archive
+
+
+def make_zip(path: Path, members: dict[str, str]):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, text in members.items():
+            archive.writestr(name, text)
+
+
+def test_members_are_read_in_place(tmp_path):
+    path = tmp_path / "corpus.zip"
+    make_zip(path, {"corpus/a/1.txt": "one", "corpus/b.txt": "two"})
+    with Archive(path) as archive:
+        root = archive / "corpus"
+        assert (root / "a").is_dir() and (root / "b.txt").is_file()
+        assert sorted(f.at for f in root.glob("**/*.txt")) == [
+            "corpus/a/1.txt",
+            "corpus/b.txt",
+        ]
+        assert (root / "a" / "1.txt").read_text() == "one"
+        # Pickled as its path and reopened once per process
+        copy = pickle.loads(pickle.dumps(root / "b.txt"))
+        assert copy.read_text() == "two"
+        assert copy.archive is open_archive(path)
+
+
+def test_open_archive_reopens_a_replaced_file(tmp_path):
+    path = tmp_path / "corpus.zip"
+    make_zip(path, {"a.txt": "old"})
+    first = open_archive(path)
+    assert open_archive(path) is first
+    assert (first / "a.txt").read_text() == "old"
+
+    replacement = tmp_path / "new.zip"
+    make_zip(replacement, {"a.txt": "new, and longer", "b.txt": "added"})
+    os.replace(replacement, path)
+    second = open_archive(path)
+    assert second is not first and first.zip.fp is None
+    assert (second / "a.txt").read_text() == "new, and longer"
+    assert (second / "b.txt").exists()
+
+
+def test_closing_the_owner_evicts_the_cached_handle(tmp_path):
+    path = tmp_path / "corpus.zip"
+    make_zip(path, {"a.txt": "a"})
+    with Archive(path):
+        cached = open_archive(path)
+    assert cached.zip.fp is None
+    assert open_archive(path) is not cached
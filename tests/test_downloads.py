@@ -0,0 +1,15 @@
+import os
+
+import downloads
+import pytest
+
+
+@pytest.mark.parametrize(
+    "check",
+    [check for _, check in downloads.CHECKS],
+    ids=[name for name, _ in downloads.CHECKS],
+)
+def test_download(check, tmp_path):
+    with downloads.serve(os.urandom(1 << 18)) as server:
+        url = f"http://127.0.0.1:{server.server_address[1]}/archive.zip"
+        check(server, url, tmp_path / "archive.zip")
@@ -0,0 +1,13 @@
+import imports
+import pytest
+
+
+@pytest.mark.parametrize(
+    "statement, budget",
+    [(statement, budget) for _, statement, budget in imports.CHECKS],
+    ids=[name for name, _, _ in imports.CHECKS],
+)
+def test_start_up_budget(statement, budget):
+    runs = [imports.probe(statement) for _ in range(3)]
+    assert not set(imports.HEAVY) & runs[0][1]
+    assert min(seconds for seconds, _ in runs) <= budget
@@ -0,0 +1,68 @@
+import io
+import json
+import random
+
+import pytest
+
+from tos_datasets.jsonstream import iter_array
+
+
+def random_value(rng: random.Random, depth: int = 0):
+    kinds = ["int", "float", "str", "bool", "null"]
+    if depth < 3:
+        kinds += ["list", "dict"]
+    kind = rng.choice(kinds)
+    if kind == "int":
+        return rng.randrange(-(10**12), 10**12)
+    if kind == "float":
+        return rng.uniform(-1e6, 1e6)
+    if kind == "str":
+        return "".join(rng.choice('ab c"\\\n€{}[],:') for _ in range(rng.randrange(12)))
+    if kind == "bool":
+        return rng.random() < 0.5
+    if kind == "null":
+        return None
+    if kind == "list":
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f"k{i}": random_value(rng, depth + 1) for i in range(rng.randrange(4))}
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_items_match_json_loads(seed):
+    rng = random.Random(seed)
+    document = {"version": random_value(rng)}
+    document["data"] = [random_value(rng) for _ in range(rng.randrange(20))]
+    document["after"] = random_value(rng)
+    text = json.dumps(document, indent=rng.choice([None, 2]), ensure_ascii=False)
+    # Small windows cut strings, numbers and escapes at every position
+    for chunk_size in (1, 3, 7, 64):
+        items = list(iter_array(io.StringIO(text), "data", chunk_size=chunk_size))
+        assert items == document["data"]
+
+
+def test_numbers_cut_by_the_window():
+    text = '{"data": [12345, 6.789e10, -0.5]}'
+    assert list(iter_array(io.StringIO(text), "data", chunk_size=2)) == [
+        12345,
+        6.789e10,
+        -0.5,
+    ]
+
+
+@pytest.mark.parametrize(
+    "text, items",
+    [
+        ("{}", []),
+        ('{"data": []}', []),
+        ('{"other": [1, 2]}', []),
+        ('{"other": {"data": [1]}, "data": [2]}', [2]),
+    ],
+)
+def test_edge_cases(text, items):
+    assert list(iter_array(io.StringIO(text), "data", chunk_size=4)) == items
+
+
+@pytest.mark.parametrize("text", ["[1, 2]", '{"data": [1, 2}', '{"data": [1 2]}'])
+def test_malformed_input_raises(text):
+    with pytest.raises(ValueError):
+        list(iter_array(io.StringIO(text), "data"))
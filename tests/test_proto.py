@@ -0,0 +1,108 @@
+import pytest
+
+from tos_datasets.proto import (
+    QA,
+    UNITS,
+    Document,
+    DocumentEvent,
+    DocumentQA,
+    DocumentSequenceClassification,
+    Event,
+    Tag,
+    dump_many,
+    validate_many,
+)
+
+
+def tagged() -> DocumentSequenceClassification:
+    return DocumentSequenceClassification(
+        document=Document(title="t", text="one two three"),
+        tags=[Tag(tag="A", start=0, end=3), Tag(tag="B", start=4, end=7)],
+    )
+
+
+def test_span_index_queries():
+    doc = tagged()
+    index = doc.build_span_index()
+    assert [tag.tag for tag in index.at(5)] == ["B"]
+    assert [tag.tag for tag in index.overlapping(2, 5)] == ["A", "B"]
+    assert [tag.tag for tag in index.within(0, 7)] == ["A", "B"]
+
+
+def test_span_index_after_replacing_an_item():
+    doc = tagged()
+    assert [tag.tag for tag in doc.build_span_index().at(1)] == ["A"]
+    doc.tags[0] = Tag(tag="C", start=8, end=13)
+    index = doc.build_span_index()
+    assert index.at(1) == []
+    assert [tag.tag for tag in index.at(9)] == ["C"]
+    assert [tag.tag for tag in index.overlapping(0, 13)] == ["B", "C"]
+
+
+def test_span_index_after_sorting_and_editing_in_place():
+    doc = tagged()
+    doc.tags.sort(key=lambda tag: -tag.start)
+    doc.tags.pop()
+    doc.tags.append(Tag(tag="D", start=0, end=1))
+    assert [tag.tag for tag in doc.build_span_index().overlapping(0, 13)] == [
+        "D",
+        "B",
+    ]
+
+
+def test_span_index_is_not_stored_on_the_model():
+    doc = tagged()
+    doc.build_span_index()
+    assert set(doc.__dict__) == {"document", "tags"}
+    assert doc.model_copy() == doc
+
+
+def test_event_and_qa_span_indexes():
+    trigger = Tag(tag="collect - trigger", start=0, end=3)
+    argument = Tag(tag="data", start=4, end=7)
+    events = DocumentEvent(
+        document=Document(title="t", text="one two three"),
+        events=[Event(event_type="collect", trigger=trigger, arguments=[])],
+    )
+    events.events[0].arguments.append(argument)
+    assert [tag for _, tag in events.build_span_index().at(5)] == [argument]
+
+    answered = QA(question="q", answer="two", start=4, end=7, is_impossible=False)
+    unanswered = QA(question="q", answer="", is_impossible=True)
+    qa = DocumentQA(
+        document=Document(title="t", text="one two three"),
+        qas=[answered, unanswered],
+    )
+    assert qa.build_span_index().overlapping(0, 13) == [answered]
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        Document(
+            title="with text",
+            text="First one. Second one.\nNext paragraph.",
+            paragraphs=["First one. Second one.\n", "Next paragraph."],
+            sentences=["First one.", "Second one.", "Next paragraph."],
+            tokens=["First", "one", ".", "Second"],
+        ),
+        Document(title="sentences only", sentences=["A b.", "", "C d."]),
+        Document(title="tokens only", tokens=["a", "b", "c"]),
+        Document(title="text only", text="Just text."),
+    ],
+    ids=lambda document: document.title,
+)
+def test_compact_materialize_round_trip(document):
+    compact = document.compact()
+    assert all(getattr(compact, unit) is None for unit in UNITS)
+    for unit in UNITS:
+        original = getattr(document, unit)
+        view = compact.view(unit)
+        assert (list(view) if view is not None else None) == original
+    assert compact.materialize().model_dump(exclude={"text"}) == document.model_dump(
+        exclude={"text"}
+    )
+    if document.text is not None:
+        assert compact.materialize() == document
+    # Compact documents survive the batch dump and validation of the converters
+    assert validate_many(Document, dump_many([compact])) == [compact]
@@ -0,0 +1,54 @@
+import pytest
+
+from tos_datasets import sink
+from tos_datasets.proto import DocumentClassification
+from tos_datasets.schema import features
+
+FEATURES = features(DocumentClassification)
+
+
+def record(title: str) -> dict:
+    return {"document": {"title": title, "text": title}, "classifications": []}
+
+
+def files(directory) -> list[str]:
+    return sorted(
+        path.relative_to(directory).as_posix() for path in directory.rglob("*")
+    )
+
+
+def test_records_round_trip(tmp_path):
+    with sink.ParquetSink(tmp_path, FEATURES, max_shard_bytes=1, batch_size=2) as s:
+        s.write_all(map(record, "abcde"))
+        s.write(record("f"), "test")
+        s.attach("labels.json", {"a": ["b"]})
+    assert s.records == {"train": 5, "test": 1}
+    assert sink.count(tmp_path) == s.records
+    # A shard is rotated after every batch
+    assert "data/train-00002-of-00003.parquet" in files(tmp_path)
+    dataset = sink.load(tmp_path)
+    assert [row["document"]["title"] for row in dataset["train"]] == list("abcde")
+    assert dataset["train"].features == FEATURES
+    assert [path.name for path in sink.attachments(tmp_path)] == ["labels.json"]
+
+
+def test_failed_rebuild_keeps_the_previous_output(tmp_path):
+    with sink.ParquetSink(tmp_path, FEATURES) as s:
+        s.write_all(map(record, "ab"))
+        s.attach("labels.json", {})
+    before = files(tmp_path)
+    with pytest.raises(RuntimeError):
+        with sink.ParquetSink(tmp_path, FEATURES, batch_size=1) as s:
+            s.write_all(map(record, "xyz"), "test")
+            raise RuntimeError
+    assert files(tmp_path) == before
+    assert sink.count(tmp_path) == {"train": 2}
+
+
+def test_rebuild_replaces_shards_and_attachments(tmp_path):
+    with sink.ParquetSink(tmp_path, FEATURES) as s:
+        s.write_all(map(record, "ab"))
+        s.attach("labels.json", {})
+    with sink.ParquetSink(tmp_path, FEATURES) as s:
+        s.write(record("c"), "test")
+    assert files(tmp_path) == ["data", "data/test-00000-of-00001.parquet"]
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from tos_datasets.spans import IntervalIndex
+
+
+def random_spans(rng: random.Random, n: int) -> list[tuple[int, int, int]]:
+    spans = []
+    for i in range(n):
+        start = rng.randrange(50)
+        # Empty spans are allowed and never hold a character
+        spans.append((start, start + rng.choice([0, 1, 2, 5, 20]), i))
+    return spans
+
+
+def ordered(spans, keep) -> list[int]:
+    return [i for s, e, i in sorted(spans, key=lambda x: (x[0], x[1])) if keep(s, e)]
+
+
+def nearest(spans, position) -> list[int]:
+    inside = ordered(spans, lambda s, e: s <= position < e)
+    if inside:
+        return inside
+
+    def distance(s, e):
+        found = []
+        if s >= position:
+            found.append(s - position)
+        if e <= position:
+            found.append(position - e)
+        return min(found)
+
+    if not spans:
+        return []
+    best = min(distance(s, e) for s, e, _ in spans)
+    return ordered(spans, lambda s, e: distance(s, e) == best)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_queries_match_a_linear_scan(seed):
+    rng = random.Random(seed)
+    spans = random_spans(rng, rng.randrange(60))
+    index = IntervalIndex(spans)
+    assert len(index) == len(spans)
+    for _ in range(100):
+        a, b = sorted(rng.randrange(-2, 75) for _ in range(2))
+        assert index.at(a) == ordered(spans, lambda s, e: s <= a < e)
+        assert index.overlapping(a, b) == ordered(
+            spans, lambda s, e: a < b and s < e and s < b and e > a
+        )
+        assert index.within(a, b) == ordered(spans, lambda s, e: a <= s and e <= b)
+        assert index.containing(a, b) == ordered(
+            spans, lambda s, e: s <= a < e and e >= max(b, a + 1)
+        )
+        assert index.nearest(a) == nearest(spans, a)
+
+
+def test_empty_spans_and_windows():
+    index = IntervalIndex([(3, 3, "empty"), (0, 5, "full")])
+    assert index.overlapping(0, 10) == ["full"]
+    assert index.overlapping(4, 4) == []
+    assert index.within(3, 3) == ["empty"]
+    assert index.at(3) == ["full"]
+    assert IntervalIndex([]).nearest(3) == []